@@ -1,16 +1,17 @@
 from __future__ import annotations
-from typing import List, Callable
+from typing import List, Callable, Tuple
 from enum import Enum
 import numpy as np
 
 from .errors import VehicleStuckError
 from .gaussian import weight_density_generator_road_and_vehicle, weight_density_generator_with_road
 from .pick_angle import pick_angle
+from .swept_arc import corridor_outline_points
 from .test_points import test_points_on_box
 from .utils.Arc import Arc, make_arc
 from .utils.Pose import Pose
 from .utils.heading import clean_heading
-from ...models.continuous.ContinuousVehicle import ContinuousVehicle, Control, FuturePose, LateralDirection, VehicleType
+from ...models.continuous.ContinuousVehicle import CollisionMode, ContinuousVehicle, Control, FuturePose, LateralDirection, VehicleType
 from ...utils.Vector2 import Vector2
 from .PDFs.NewPDFs import angle_probability_from_pdf
 
@@ -22,6 +23,12 @@ class Mode(Enum):
 
 RUN_MODE = Mode.WITH_ROAD_AND_VEHICLES
 
+class ArcCollisionMode(Enum):
+	SPLIT = 0 # test the pose at the end of every ARC_SPLIT_LENGTH piece of the arc
+	SWEPT = 1 # test the corridor swept by the vehicle for obstacles, and only the pieces of the arc near other vehicles
+
+ARC_COLLISION_MODE = ArcCollisionMode.SPLIT
+
 NUM_POSES_IN_PLAN = 4
 MAX_COLLISION_COUNT_BEFORE_BACKTRACK = 5
 MAX_COLLISION_COUNT_BEFORE_TERMINATION = 20
@@ -31,12 +38,16 @@ MAX_ARRIVING_ANGLE_DISCREPANCY = np.pi / 10
 ARC_SPLIT_LENGTH = 0.1
 REMOVE_POSE_TIME = 0.6
 MIN_TURNING_RADIUS = 10
+COLLISION_MODE = CollisionMode.test_points # separating_axis tests the boxes of the vehicles for overlap instead
+CLIP_TEST_POINTS_TO_WIDTH = False # True keeps the front and back test points on the box, see test_points_on_box
 
 class Algorithm1Vehicle(ContinuousVehicle):
 	speed: float
 	distance_between_poses: float
 	cone_angle: float
 	wasted_proposal_count: int
+	broad_phase_candidate_count: int # observed vehicles considered by the arc collision checks so far, one per vehicle per arc
+	broad_phase_culled_count: int # how many of them the broad phase discarded
 	_width = 2
 	_length = 3
 	collision_test_points_local_frame: List[Vector2] = []
@@ -47,11 +58,30 @@ class Algorithm1Vehicle(ContinuousVehicle):
 		self.distance_between_poses = speed * 2
 		self.cone_angle = np.arccos(1 - 0.5 * (self.distance_between_poses / MIN_TURNING_RADIUS) ** 2)
 		self.wasted_proposal_count = 0
-		self.collision_test_points_local_frame = test_points_on_box(self._width, self._length, 0.1)
+		self.broad_phase_candidate_count = 0
+		self.broad_phase_culled_count = 0
+		self.collision_test_points_local_frame = test_points_on_box(self._width, self._length, 0.1, CLIP_TEST_POINTS_TO_WIDTH)
+		self.collision_mode = COLLISION_MODE
 
 	def contains(self, position: Vector2) -> bool:
 		return -self._width / 2 < position.x < self._width / 2 and -self._length / 2 < position.y < self._length / 2
 
+	@property
+	def box_half_extents(self) -> Tuple[float, float]: return self._width / 2, self._length / 2
+
+	@property
+	def collision_half_extents(self) -> Tuple[float, float]:
+		"""Half extents of a box centered on the vehicle containing everything its collision checks test"""
+		half_width, half_length = self.box_half_extents
+		if self.collision_mode == CollisionMode.separating_axis: return half_width, half_length
+		# the baseline test points stick out of the box, see test_points_on_box
+		test_points_half_width, test_points_half_length = np.max(np.abs(self.collision_test_points_array), axis=0)
+		return max(half_width, test_points_half_width), max(half_length, test_points_half_length)
+
+	def contains_points(self, positions: np.ndarray) -> np.ndarray:
+		x, y = positions[..., 0], positions[..., 1]
+		return (-self._width / 2 < x) & (x < self._width / 2) & (-self._length / 2 < y) & (y < self._length / 2)
+
 	def weight_density_generator(self, position: Vector2, heading: float, time: float) -> Callable[[float], float]:
 		if RUN_MODE == Mode.SIMPLE_CONE:
 			return lambda angle: 1
@@ -97,23 +127,73 @@ class Algorithm1Vehicle(ContinuousVehicle):
 		else:
 			raise NotImplementedError
 
+	@property
+	def max_speed(self) -> float: return self.speed
+
 	def arc_will_collide(self, arc: Arc, start_time: float):
 		"""Check whether the vehicle will collide when running on the arc"""
+		if ARC_COLLISION_MODE == ArcCollisionMode.SWEPT:
+			return self.swept_arc_will_collide(arc, start_time, self.arc_candidates(arc, start_time, 0))
 		num_arcs = int(arc.length / ARC_SPLIT_LENGTH)
 		if num_arcs == 0: num_arcs = 1
 		little_arc_length = arc.length / num_arcs
 		little_arc_duration = little_arc_length / self.speed
+		# split can return one more little arc than asked for, so the broad phase covers one more
+		candidates = self.arc_candidates(arc, start_time, little_arc_length)
 		for index, little_arc in enumerate(arc.split(num_arcs)):
 			little_arc_end_time = start_time + (index + 1) * little_arc_duration
-			if self.position_will_collide(little_arc.end_position, little_arc.end_heading, little_arc_end_time):
+			if self.position_will_collide(little_arc.end_position, little_arc.end_heading, little_arc_end_time, candidates):
 				return True
 		return False
 
-	def clean_future_poses(self):
+	def arc_candidates(self, arc: Arc, start_time: float, extra_length: float) -> np.ndarray:
+		"""
+		Broad phase: indices of the observed vehicles that may come near the vehicle while it runs on the arc
+		and extra_length beyond it. The others cannot collide with it there, so the collision checks skip them.
+		"""
+		duration = (arc.length + extra_length) / self.speed
+		radius = arc.length / 2 + extra_length + np.hypot(*self.collision_half_extents)
+		candidates = self.vehicles_near(arc.point_on_arc(0.5).np_array, radius, start_time + duration / 2, duration / 2)
+		self.broad_phase_candidate_count += len(self.observed_vehicles)
+		self.broad_phase_culled_count += len(self.observed_vehicles) - len(candidates)
+		return candidates
+
+	def swept_arc_will_collide(self, arc: Arc, start_time: float, candidates: np.ndarray | None = None):
+		"""
+		Check whether the vehicle will collide when running on the arc, testing the outline of the corridor the vehicle
+		sweeps for obstacles, and splitting the arc in halves until each piece is clear of the other vehicles
+		(bounded by circles) or is ARC_SPLIT_LENGTH long or shorter, in which case its end pose is tested.
+		Only the candidate observed vehicles (by default, all of them) are tested.
+		"""
+		half_width, half_length = self.collision_half_extents
+		if self.points_are_in_obstacle(corridor_outline_points(arc, half_width, half_length, ARC_SPLIT_LENGTH)): return True
+		if candidates is not None and len(candidates) == 0: return False
+
+		duration = arc.length / self.speed
+		bounding_radius = np.hypot(half_width, half_length)
+		pieces = [(0.0, 1.0)] # proportions of the arc, the next one to test is last
+		while len(pieces) > 0:
+			start, end = pieces.pop()
+			middle = (start + end) / 2
+			# every pose of the vehicle on the piece is within half the piece's length of its middle
+			piece_radius = (end - start) * arc.length / 2 + bounding_radius
+			middle_position = arc.point_on_arc(middle)
+			piece_time_margin = (end - start) * duration / 2
+			near = self.vehicles_near(middle_position.np_array, piece_radius, start_time + middle * duration, piece_time_margin, candidates)
+			if len(near) == 0: continue
+			if (end - start) * arc.length <= ARC_SPLIT_LENGTH:
+				if self.position_will_collide_with_vehicles(arc.point_on_arc(end), arc.heading_on_arc(end), start_time + end * duration, candidates=near):
+					return True
+				continue
+			pieces.append((middle, end))
+			pieces.append((start, middle))
+		return False
+
+	def clean_future_poses(self, verbose: bool = True):
 		"""
 		Clears the future poses if the current arc will lead to a collision
 		or if there is a large discrepancy in the arriving angle at the next pose.
-		Also removes the next pose if the vehicle is close to it.
+		Also removes the next pose if the vehicle is close to it. verbose prints what was done.
 		"""
 		if len(self.future_poses) == 0: return
 		next_pose = self.future_poses[0].pose
@@ -123,10 +203,10 @@ class Algorithm1Vehicle(ContinuousVehicle):
 		heading_discrepancy = np.abs(arriving_heading_diff)
 		if heading_discrepancy > MAX_ARRIVING_ANGLE_DISCREPANCY:
 			self.future_poses.clear()
-			print("deleted plan due to large discrepancy")
+			if verbose: print("deleted plan due to large discrepancy")
 		elif next_pose.position.length < self.speed * REMOVE_POSE_TIME:
 			del self.future_poses[0]
-			print("reached a pose")
+			if verbose: print("reached a pose")
 
 	def add_poses(self):
 		"""Keeps adding poses until we have NUM_POSES_IN_PLAN many poses in the plan"""
@@ -138,7 +218,7 @@ class Algorithm1Vehicle(ContinuousVehicle):
 			final_time = 0 if len(self.future_poses) == 0 else self.future_poses[-1].time
 			weight_density_function = self.weight_density_generator(final_pose.position, final_pose.heading, final_time)
 			max_weight = 1
-			angle_picked = pick_angle(weight_density_function, max_weight, -self.cone_angle / 2, self.cone_angle / 2)
+			angle_picked = pick_angle(weight_density_function, max_weight, -self.cone_angle / 2, self.cone_angle / 2, self.rng)
 			next_position_last_pose_frame = Vector2(np.sin(angle_picked), np.cos(angle_picked)) * self.distance_between_poses
 			next_position = final_pose.position_relative_to_world(next_position_last_pose_frame)
 			new_arc = make_arc(final_pose, next_position)
@@ -206,7 +286,19 @@ class Algorithm1Vehicle(ContinuousVehicle):
 
 	def update_control(self):
 		self.rrt()
+		self.steer_to_next_pose()
+
+	def track_plan(self):
+		# called on every physics step, so it does not print
+		self.clean_future_poses(verbose=False)
+		# with no plan left, keep the current control until the vehicle replans
+		if len(self.future_poses) > 0: self.steer_to_next_pose()
+
+	def needs_replan(self) -> bool:
+		return len(self.future_poses) == 0
 
+	def steer_to_next_pose(self):
+		"""Sets the control to follow the arc to the first pose of the plan"""
 		next_pose = self.future_poses[0].pose
 
 		arc = make_arc(Pose.zero(), next_pose.position)
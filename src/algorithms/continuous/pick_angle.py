@@ -1,10 +1,18 @@
 from __future__ import annotations
 
-from random import uniform
+from random import Random, uniform
 from typing import Callable
 
-def pick_angle(weight_density_function: Callable[[float], float], max_weight: float, min_angle: float, max_angle: float):
+def pick_angle(
+	weight_density_function: Callable[[float], float],
+	max_weight: float,
+	min_angle: float,
+	max_angle: float,
+	rng: Random | None = None
+):
+	"""Rejection sampling of an angle. Draws from rng if given, otherwise from the global random generator."""
+	draw = uniform if rng is None else rng.uniform
 	while True:
-		angle = uniform(min_angle, max_angle)
-		value = uniform(0, max_weight)
+		angle = draw(min_angle, max_angle)
+		value = draw(0, max_weight)
 		if value < weight_density_function(angle): return angle
\ No newline at end of file
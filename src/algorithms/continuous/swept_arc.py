@@ -0,0 +1,27 @@
+import numpy as np
+
+from .utils.Arc import Arc
+
+def corridor_outline_points(arc: Arc, half_width: float, half_length: float, spacing: float = 0.1) -> np.ndarray:
+	"""
+	Returns (N, 2) points, every spacing or less, on the outline of an annular sector that contains every pose
+	of a box (half_width across, half_length along the heading, centered on the vehicle) that follows the arc.
+	Like with the collision test points, an obstacle entirely inside the outline is missed.
+	"""
+	center, radius = arc.circle.center, arc.circle.radius
+	inner_radius = max(radius - half_width, 0)
+	outer_radius = np.hypot(radius + half_width, half_length) # reached by the outer corners
+	# the corners stick out ahead of the box's center by at most this angle, at the inner radius
+	angle_margin = np.arctan2(half_length, inner_radius)
+	direction = 1 if arc.arc_angle >= 0 else -1
+	start_angle = arc.start_angle - direction * angle_margin
+	end_angle = arc.start_angle + arc.arc_angle + direction * angle_margin
+
+	arc_count = int(np.ceil(outer_radius * abs(end_angle - start_angle) / spacing)) + 1
+	angles = np.linspace(start_angle, end_angle, arc_count)
+	cap_count = int(np.ceil((outer_radius - inner_radius) / spacing)) + 1
+	cap_radii = np.linspace(inner_radius, outer_radius, cap_count)
+
+	all_angles = np.concatenate((angles, angles, np.full(cap_count, start_angle), np.full(cap_count, end_angle)))
+	all_radii = np.concatenate((np.full(arc_count, inner_radius), np.full(arc_count, outer_radius), cap_radii, cap_radii))
+	return np.stack((np.sin(all_angles) * all_radii + center.x, np.cos(all_angles) * all_radii + center.y), axis=-1)
\ No newline at end of file
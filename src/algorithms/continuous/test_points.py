@@ -6,12 +6,18 @@ import numpy as np
 
 from src.utils.Vector2 import Vector2
 
-def test_points_on_box(width: float, length: float, spacing: float = 0.1) -> List[Vector2]:
+def test_points_on_box(width: float, length: float, spacing: float = 0.1, clip_to_width: bool = False) -> List[Vector2]:
+	"""
+	Points every spacing on the edges of a width x length box centered on the origin, with its length along y.
+	The front and back rows of the baseline run from -width / 2 to length / 2, past the right side of the box.
+	clip_to_width stops them at width / 2, so that every point is on the box.
+	"""
 	half_width, half_length = width / 2, length / 2
 	test_points = []
 	# front and back
+	row_end = half_width if clip_to_width else half_length
 	for y in [-half_length, half_length]:
-		for x in np.arange(-half_width, half_length, spacing):
+		for x in np.arange(-half_width, row_end, spacing):
 			test_points.append(Vector2(x, y))
 
 	# both sides
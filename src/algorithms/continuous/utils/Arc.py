@@ -63,6 +63,11 @@ class Arc:
 		point_angle = self.start_angle + self.arc_angle * proportion
 		return Vector2(np.sin(point_angle), np.cos(point_angle)) * self.circle.radius + self.circle.center
 
+	def heading_on_arc(self, proportion: float):
+		if proportion < 0 or proportion > 1: raise Exception('proportion should be between 0 and 1')
+		point_angle = self.start_angle + self.arc_angle * proportion
+		return clean_heading(point_angle + (1 if self.is_clock_wise else -1) * np.pi / 2)
+
 
 def make_arc_from_origin(goal_position: Vector2) -> Arc:
 	perp_bisector_slope = -1 / goal_position.slope
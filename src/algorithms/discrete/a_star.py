@@ -0,0 +1,90 @@
+import heapq
+from array import array
+from typing import Dict, List
+import numpy as np
+from ...models.discrete.ArrayGrid import ArrayGrid
+from ...models.discrete.DiscreteVehicle import DiscreteVehicle
+from ...models.discrete.utils import DiscretePosition, DiscreteVehicleType, Grid
+from .utils import GOAL, ROAD, cell_codes, index_path, neighbour_indices, new_parents, position_to_index, reconstruct_path
+
+NO_GOAL = np.iinfo(np.int32).max # heuristic value when there are no goal cells at all
+
+def manhattan_distance_to_goals(codes: np.ndarray) -> np.ndarray:
+	"""
+	Manhattan distance from every cell to the closest goal cell, ignoring obstacles.
+	It never overestimates the number of moves to a goal, so it is an admissible heuristic.
+	The distance is separable, so it is computed with one pass in each direction along the columns and then the rows.
+	"""
+	height, width = codes.shape
+	distances = np.where(codes == GOAL, 0, NO_GOAL).astype(np.int64)
+	for y in range(1, height): np.minimum(distances[y], distances[y - 1] + 1, out=distances[y])
+	for y in range(height - 2, -1, -1): np.minimum(distances[y], distances[y + 1] + 1, out=distances[y])
+	for x in range(1, width): np.minimum(distances[:, x], distances[:, x - 1] + 1, out=distances[:, x])
+	for x in range(width - 2, -1, -1): np.minimum(distances[:, x], distances[:, x + 1] + 1, out=distances[:, x])
+	return np.minimum(distances, NO_GOAL)
+
+def solve_maze(
+	grid: Grid | ArrayGrid,
+	current_position: DiscretePosition,
+) -> List[DiscretePosition] | None:
+	"""A* search from the current position to the closest goal cell. Returns a shortest path."""
+	codes = cell_codes(grid)
+	height, width = codes.shape
+	size = width * height
+	cells = codes.tobytes() # one byte per cell
+	heuristic = manhattan_distance_to_goals(codes).ravel().tolist()
+	start = position_to_index(current_position, width)
+	if heuristic[start] == NO_GOAL: return None
+
+	cost_so_far = array('i', [size]) * size # no path is longer than the number of cells
+	cost_so_far[start] = 0
+	closed = bytearray(size)
+	parents = new_parents(size)
+	# ties in the estimated total cost are broken towards the cell closest to a goal
+	open_cells = [(heuristic[start], heuristic[start], start)]
+	while len(open_cells) > 0:
+		_, _, index = heapq.heappop(open_cells)
+		if closed[index]: continue
+		closed[index] = 1
+		if cells[index] == GOAL and index != start: return reconstruct_path(parents, start, index, width)
+
+		cost = cost_so_far[index] + 1
+		for neighbour in neighbour_indices(index, width, size):
+			if closed[neighbour] or cost >= cost_so_far[neighbour]: continue
+			cell = cells[neighbour]
+			if cell != ROAD and cell != GOAL: continue
+			cost_so_far[neighbour] = cost
+			parents[neighbour] = index
+			heapq.heappush(open_cells, (cost + heuristic[neighbour], heuristic[neighbour], neighbour))
+	return None
+
+class DiscreteCivilianVehicle(DiscreteVehicle):
+	def __init__(self, position: DiscretePosition):
+		super().__init__(DiscreteVehicleType.civilian, position)
+
+	def compute_next_point(self) -> DiscretePosition:
+		return self.position
+
+class DiscreteEmergencyVehicle(DiscreteVehicle):
+	path: List[DiscretePosition] | None
+	path_indices: Dict[DiscretePosition, int] # index of each position on the path
+
+	def __init__(self, position: DiscretePosition):
+		super().__init__(DiscreteVehicleType.emergency, position)
+		self.path = None
+		self.path_indices = {}
+
+	def compute_next_point(self) -> DiscretePosition:
+		if self.path is None:
+			path = solve_maze(self.grid, self.position)
+			if path is not None:
+				assert len(path) > 0
+				self.path = path
+				self.path_indices = index_path(path)
+				return path[0]
+			return self.position
+		else:
+			index = self.path_indices.get(self.position)
+			if index is None: raise NotImplementedError
+			if index + 1 < len(self.path): return self.path[index + 1]
+			else: return self.position # reached the goal
\ No newline at end of file
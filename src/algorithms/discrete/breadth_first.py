@@ -1,33 +1,40 @@
-from typing import List
+from collections import deque
+from typing import Dict, List
+from ...models.discrete.ArrayGrid import ArrayGrid
 from ...models.discrete.DiscreteVehicle import DiscreteVehicle
 from ...models.discrete.utils import DiscretePosition, DiscreteVehicleType, Grid
-from .utils import possible_moves, is_road, is_goal, get_next_position
-
-History = List[DiscretePosition]
+from .utils import GOAL, ROAD, cell_codes, index_path, neighbour_indices, new_parents, position_to_index, reconstruct_path
 
 def solve_maze(
-	grid: Grid,
+	grid: Grid | ArrayGrid,
 	current_position: DiscretePosition,
 ) -> List[DiscretePosition] | None:
-	configurations_to_explore: List[History] = []
-
-	for move in possible_moves:
-		proposal = get_next_position(current_position, move)
-		if is_goal(proposal, grid): return [proposal]
-		if is_road(proposal, grid):
-			history = [current_position, proposal]
-			configurations_to_explore.append(history)
-
-	while len(configurations_to_explore) > 0:
-		history = configurations_to_explore[0] # always examine the first one
-
-		for move in possible_moves:
-			proposal = get_next_position(history[-1], move)
-			if is_goal(proposal, grid): return [*history[1:], proposal]
-			if is_road(proposal, grid):
-				configurations_to_explore.append([*history, proposal])
+	"""
+	Breadth first search from the current position to the closest goal cell.
+	Each cell is visited at most once, so this is O(number of cells) in time and memory.
+	"""
+	codes = cell_codes(grid)
+	height, width = codes.shape
+	size = width * height
+	cells = codes.tobytes() # one byte per cell
+	start = position_to_index(current_position, width)
 
-		del configurations_to_explore[0]
+	visited = bytearray(size)
+	visited[start] = 1
+	parents = new_parents(size)
+	frontier = deque([start])
+	while len(frontier) > 0:
+		index = frontier.popleft()
+		for neighbour in neighbour_indices(index, width, size):
+			if visited[neighbour]: continue
+			visited[neighbour] = 1
+			cell = cells[neighbour]
+			if cell == GOAL:
+				parents[neighbour] = index
+				return reconstruct_path(parents, start, neighbour, width)
+			if cell == ROAD:
+				parents[neighbour] = index
+				frontier.append(neighbour)
 	return None
 
 class DiscreteCivilianVehicle(DiscreteVehicle):
@@ -39,10 +46,12 @@ class DiscreteCivilianVehicle(DiscreteVehicle):
 
 class DiscreteEmergencyVehicle(DiscreteVehicle):
 	path: List[DiscretePosition] | None
+	path_indices: Dict[DiscretePosition, int] # index of each position on the path
 
 	def __init__(self, position: DiscretePosition):
 		super().__init__(DiscreteVehicleType.emergency, position)
 		self.path = None
+		self.path_indices = {}
 
 	def compute_next_point(self) -> DiscretePosition:
 		if self.path is None:
@@ -50,11 +59,11 @@ class DiscreteEmergencyVehicle(DiscreteVehicle):
 			if path is not None:
 				assert len(path) > 0
 				self.path = path
+				self.path_indices = index_path(path)
 				return path[0]
 			return self.position
 		else:
-			for index, pos in enumerate(self.path):
-				if pos != self.position: continue
-				if index + 1 < len(self.path): return self.path[index + 1]
-				else: return self.position # reached the goal
-			raise NotImplementedError
\ No newline at end of file
+			index = self.path_indices.get(self.position)
+			if index is None: raise NotImplementedError
+			if index + 1 < len(self.path): return self.path[index + 1]
+			else: return self.position # reached the goal
\ No newline at end of file
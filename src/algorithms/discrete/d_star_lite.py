@@ -0,0 +1,201 @@
+from __future__ import annotations
+import heapq
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+from ...models.discrete.ArrayGrid import EMPTY, ArrayGrid
+from ...models.discrete.DiscreteVehicle import DiscreteVehicle
+from ...models.discrete.utils import DiscretePosition, DiscreteVehicleType
+from .utils import GOAL, ROAD, cell_codes, index_to_position, neighbour_indices, position_to_index
+
+INFINITY = float('inf')
+Key = Tuple[float, float]
+
+class DStarLite:
+	"""
+	D* Lite search from all the goal cells back to the vehicle.
+	When cells become blocked or free, or the vehicle moves, only the part of the search tree
+	affected by the change is repaired, so the cost of replanning scales with the number of changed cells.
+	The cell the vehicle is on is always treated as free.
+	"""
+	width: int
+	size: int
+	start: int
+	cells: bytearray # cell codes as of the last update
+	g: List[float] # cost to the closest goal when the cell was last expanded
+	rhs: List[float] # one step lookahead of g
+	_queue: List[Tuple[float, float, int]]
+	_queued_keys: Dict[int, Key] # key of every cell in the queue. Entries of _queue that do not match are stale.
+	_key_modifier: float
+	_last_start: int
+
+	def __init__(self, codes: np.ndarray, start: DiscretePosition):
+		self.width = codes.shape[1]
+		self.size = codes.size
+		self.cells = bytearray(codes.tobytes())
+		self.start = position_to_index(start, self.width)
+		self.g = [INFINITY] * self.size
+		self.rhs = [INFINITY] * self.size
+		self._queue = []
+		self._queued_keys = {}
+		self._key_modifier = 0
+		self._last_start = self.start
+		for index in np.flatnonzero(codes.ravel() == GOAL).tolist():
+			self.rhs[index] = 0
+			self._push(index)
+
+	def heuristic(self, index: int) -> int:
+		"""Manhattan distance from the vehicle to the cell"""
+		return abs(index % self.width - self.start % self.width) + abs(index // self.width - self.start // self.width)
+
+	def is_goal(self, index: int) -> bool:
+		return self.cells[index] == GOAL
+
+	def is_free(self, index: int) -> bool:
+		return index == self.start or self.cells[index] == ROAD or self.cells[index] == GOAL
+
+	def cost(self, index_from: int, index_to: int) -> float:
+		return 1 if self.is_free(index_from) and self.is_free(index_to) else INFINITY
+
+	def calculate_key(self, index: int) -> Key:
+		g_or_rhs = min(self.g[index], self.rhs[index])
+		return g_or_rhs + self.heuristic(index) + self._key_modifier, g_or_rhs
+
+	def _push(self, index: int):
+		key = self.calculate_key(index)
+		self._queued_keys[index] = key
+		heapq.heappush(self._queue, (key[0], key[1], index))
+
+	def _top(self) -> Tuple[Key, int] | None:
+		"""Returns the smallest key in the queue, dropping stale entries"""
+		while len(self._queue) > 0:
+			k1, k2, index = self._queue[0]
+			if self._queued_keys.get(index) == (k1, k2): return (k1, k2), index
+			heapq.heappop(self._queue)
+		return None
+
+	def update_vertex(self, index: int):
+		if self.is_goal(index):
+			self.rhs[index] = 0
+		elif not self.is_free(index):
+			self.rhs[index] = INFINITY
+		else:
+			rhs = INFINITY
+			for n in neighbour_indices(index, self.width, self.size):
+				if self.g[n] + 1 < rhs and self.is_free(n): rhs = self.g[n] + 1
+			self.rhs[index] = rhs
+		self._queued_keys.pop(index, None)
+		if self.g[index] != self.rhs[index]: self._push(index)
+
+	def compute_shortest_path(self):
+		while True:
+			top = self._top()
+			if top is None: break
+			key, index = top
+			if key >= self.calculate_key(self.start) and self.rhs[self.start] == self.g[self.start]: break
+			heapq.heappop(self._queue)
+			del self._queued_keys[index]
+
+			new_key = self.calculate_key(index)
+			if key < new_key:
+				self._push(index)
+			elif self.g[index] > self.rhs[index]:
+				self.g[index] = self.rhs[index]
+				for n in neighbour_indices(index, self.width, self.size):
+					self.update_vertex(n)
+			else:
+				self.g[index] = INFINITY
+				self.update_vertex(index)
+				for n in neighbour_indices(index, self.width, self.size):
+					self.update_vertex(n)
+
+	def move_start(self, start: DiscretePosition):
+		new_start = position_to_index(start, self.width)
+		if new_start == self.start: return
+		old_start = self.start
+		self.start = new_start
+		self._key_modifier += self.heuristic(self._last_start)
+		self._last_start = new_start
+		# the old cell is no longer treated as free just because the vehicle was on it, and the new cell now is
+		self.update_cells([], [old_start, new_start])
+
+	def update_cells(self, changes: Iterable[Tuple[int, int]], extra_indices: Iterable[int] = ()):
+		"""Applies (index, new cell code) changes and repairs the cells whose costs are affected"""
+		changed = set(extra_indices)
+		for index, code in changes:
+			if self.cells[index] == code: continue
+			self.cells[index] = code
+			changed.add(index)
+
+		# the costs of the edges into and out of a changed cell change, which affects the cell and its neighbours
+		affected = set(changed)
+		for index in changed:
+			affected.update(neighbour_indices(index, self.width, self.size))
+		for index in affected:
+			self.update_vertex(index)
+
+	def next_position(self) -> DiscretePosition | None:
+		"""Returns the neighbouring cell on a shortest path to a goal, or None if no goal can be reached"""
+		best_index, best_cost = None, INFINITY
+		for n in neighbour_indices(self.start, self.width, self.size):
+			cost = self.cost(self.start, n) + self.g[n]
+			if cost < best_cost: best_index, best_cost = n, cost
+		if best_index is None: return None
+		return index_to_position(best_index, self.width)
+
+class DiscreteCivilianVehicle(DiscreteVehicle):
+	def __init__(self, position: DiscretePosition):
+		super().__init__(DiscreteVehicleType.civilian, position)
+
+	def compute_next_point(self) -> DiscretePosition:
+		return self.position
+
+class DiscreteEmergencyVehicle(DiscreteVehicle):
+	"""
+	Keeps a D* Lite search alive between ticks and repairs it with the cells that changed since the last tick.
+	With an ArrayGrid the changed cells are read from its journal. With a Grid they are found by comparing with a copy.
+	"""
+	planner: DStarLite | None
+	reached_goal: bool
+	_synced_version: int
+	_synced_codes: np.ndarray | None
+
+	def __init__(self, position: DiscretePosition):
+		super().__init__(DiscreteVehicleType.emergency, position)
+		self.planner = None
+		self.reached_goal = False
+		self._synced_version = -1
+		self._synced_codes = None
+
+	def take_changes(self) -> List[Tuple[int, int]] | None:
+		"""Returns (index, new code) of the cells changed since the last call, or None if a full replan is needed"""
+		if isinstance(self.grid, ArrayGrid):
+			last_version, self._synced_version = self._synced_version, self.grid.version
+			if self.grid.version == last_version: return []
+			if self.grid.version != last_version + 1 or self.grid.changed_cells is None: return None
+			if len(self.grid.changed_cells) == 0: return []
+			xs, ys = np.array(list(set(self.grid.changed_cells))).T
+			occupants, static = self.grid.occupancy[ys, xs], self.grid.static[ys, xs]
+			codes = np.where(occupants == EMPTY, static, occupants)
+			return list(zip((ys * self.grid.width + xs).tolist(), codes.tolist()))
+
+		codes, last_codes = cell_codes(self.grid).ravel(), self._synced_codes
+		self._synced_codes = codes
+		if last_codes is None or last_codes.shape != codes.shape: return None
+		indices = np.flatnonzero(codes != last_codes)
+		return list(zip(indices.tolist(), codes[indices].tolist()))
+
+	def compute_next_point(self) -> DiscretePosition:
+		if self.reached_goal: return self.position
+
+		changes = self.take_changes()
+		if self.planner is None or changes is None:
+			self.planner = DStarLite(cell_codes(self.grid), self.position)
+		else:
+			self.planner.move_start(self.position)
+			self.planner.update_cells(changes)
+
+		self.planner.compute_shortest_path()
+		next_position = self.planner.next_position()
+		if next_position is None: return self.position
+		if self.planner.is_goal(position_to_index(next_position, self.planner.width)): self.reached_goal = True
+		return next_position
\ No newline at end of file
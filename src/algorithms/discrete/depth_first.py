@@ -1,33 +1,52 @@
-from typing import List
+from typing import Dict, List
+from ...models.discrete.ArrayGrid import ArrayGrid
 from ...models.discrete.DiscreteVehicle import DiscreteVehicle
 from ...models.discrete.utils import DiscretePosition, DiscreteVehicleType, Grid
-from .utils import possible_moves, is_road, is_goal, get_next_position
+from .utils import GOAL, ROAD, cell_codes, index_path, neighbour_indices, new_parents, position_to_index, reconstruct_path
 
 def solve_maze(
-	grid: Grid,
+	grid: Grid | ArrayGrid,
 	current_position: DiscretePosition,
-	history: List[DiscretePosition]
+	history: List[DiscretePosition] | None = None
 ) -> List[DiscretePosition] | None:
-	for move in possible_moves:
-		proposal = get_next_position(current_position, move)
+	"""
+	Depth first search from the current position to a goal cell, using an explicit stack instead of recursion.
+	Cells in the history and cells that have already been explored are never explored again,
+	so this is O(number of cells) in time and memory regardless of the length of the path.
+	"""
+	codes = cell_codes(grid)
+	height, width = codes.shape
+	size = width * height
+	cells = codes.tobytes() # one byte per cell
+	start = position_to_index(current_position, width)
 
-		# if goal, return the proposal
-		if is_goal(proposal, grid):
-			return [proposal]
-
-		# if the vehicle has been to the proposal, ignore
-		has_been_there = False
+	visited = bytearray(size)
+	visited[start] = 1
+	if history is not None:
 		for cell in history:
-			if cell == proposal:
-				has_been_there = True
-				break
-		if has_been_there: continue
-
-		# if the proposal is road, try to find a path from there
-		if is_road(proposal, grid):
-			result = solve_maze(grid, proposal, [*history, current_position])
-			if result is not None:
-				return [proposal, *result]
+			visited[position_to_index(cell, width)] = 1
+	parents = new_parents(size)
+
+	# each stack entry is a cell on the current branch and the neighbours it has left to try
+	stack = [(start, iter(neighbour_indices(start, width, size)))]
+	while len(stack) > 0:
+		index, neighbours = stack[-1]
+		neighbour = next(neighbours, None)
+		if neighbour is None: # all neighbours tried, so backtrack
+			stack.pop()
+			continue
+
+		# if goal, the path is complete
+		if cells[neighbour] == GOAL:
+			parents[neighbour] = index
+			return reconstruct_path(parents, start, neighbour, width)
+
+		# if the proposal is unexplored road, try to find a path from there
+		if visited[neighbour]: continue
+		visited[neighbour] = 1
+		if cells[neighbour] == ROAD:
+			parents[neighbour] = index
+			stack.append((neighbour, iter(neighbour_indices(neighbour, width, size))))
 	return None
 
 
@@ -40,22 +59,24 @@ class DiscreteCivilianVehicle(DiscreteVehicle):
 
 class DiscreteEmergencyVehicle(DiscreteVehicle):
 	path: List[DiscretePosition] | None
+	path_indices: Dict[DiscretePosition, int] # index of each position on the path
 
 	def __init__(self, position: DiscretePosition):
 		super().__init__(DiscreteVehicleType.emergency, position)
 		self.path = None
+		self.path_indices = {}
 
 	def compute_next_point(self) -> DiscretePosition:
 		if self.path is None:
-			path = solve_maze(self.grid, self.position, [])
+			path = solve_maze(self.grid, self.position)
 			if path is not None:
 				assert len(path) > 0
 				self.path = path
+				self.path_indices = index_path(path)
 				return path[0]
 			return self.position
 		else:
-			for index, pos in enumerate(self.path):
-				if pos != self.position: continue
-				if index + 1 < len(self.path): return self.path[index + 1]
-				else: return self.position # reached the goal
-			raise NotImplementedError
\ No newline at end of file
+			index = self.path_indices.get(self.position)
+			if index is None: raise NotImplementedError
+			if index + 1 < len(self.path): return self.path[index + 1]
+			else: return self.position # reached the goal
\ No newline at end of file
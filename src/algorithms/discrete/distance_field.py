@@ -0,0 +1,92 @@
+from __future__ import annotations
+from typing import List
+import numpy as np
+from ...models.discrete.ArrayGrid import ArrayGrid
+from ...models.discrete.DiscreteVehicle import DiscreteVehicle
+from ...models.discrete.utils import DiscretePosition, DiscreteSimulationCellType, DiscreteVehicleType, Grid
+from .utils import GOAL, cell_codes, get_next_position, is_goal, is_road, possible_moves
+
+UNREACHABLE = -1 # distance of a cell from which no goal can be reached
+
+class DistanceField:
+	"""
+	Number of moves from every cell to the closest goal cell.
+	It is computed by flooding outwards from all the goal cells at the same time,
+	after which any number of vehicles can find their next move in O(1) by going downhill.
+	Civilians are treated as obstacles, so update recomputes the field when they have moved,
+	and vehicles given the same field share the work.
+	"""
+	grid: Grid | ArrayGrid | None
+	distances: np.ndarray | None # indexed by [y, x]
+	civilians: np.ndarray | None # cells that held a civilian when the field was computed
+
+	def __init__(self, grid: Grid | ArrayGrid | None = None):
+		self.grid = None
+		self.distances = None
+		self.civilians = None
+		if grid is not None: self.update(grid)
+
+	def update(self, grid: Grid | ArrayGrid):
+		"""Computes the field of the given grid, unless it was already computed with the same civilians"""
+		codes = cell_codes(grid)
+		civilians = codes == DiscreteSimulationCellType.civilian.value
+		if grid is self.grid and np.array_equal(civilians, self.civilians): return
+		self.grid = grid
+		self.civilians = civilians
+
+		height, width = codes.shape
+		size = width * height
+		codes = codes.ravel()
+		can_enter = (codes != DiscreteSimulationCellType.obstacle.value) & ~civilians.ravel()
+
+		distances = np.full(size, UNREACHABLE, dtype=np.int32)
+		frontier = np.flatnonzero(codes == GOAL)
+		distances[frontier] = 0
+		distance = 0
+		while frontier.size > 0:
+			distance += 1
+			x = frontier % width
+			neighbours = np.concatenate([
+				frontier[frontier + width < size] + width, # up
+				frontier[x > 0] - 1, # left
+				frontier[x < width - 1] + 1, # right
+				frontier[frontier >= width] - width, # down
+			])
+			neighbours = neighbours[can_enter[neighbours] & (distances[neighbours] == UNREACHABLE)]
+			distances[neighbours] = distance
+			frontier = np.unique(neighbours)
+		self.distances = distances.reshape(height, width)
+
+	def distance(self, position: DiscretePosition) -> int:
+		return int(self.distances[position.y, position.x])
+
+	def next_position(self, position: DiscretePosition) -> DiscretePosition:
+		"""Returns a free neighbouring cell that is one move closer to a goal, or the current position if there is none"""
+		distance = self.distance(position)
+		if distance == UNREACHABLE or distance == 0: return position
+		height, width = self.distances.shape
+		for move in possible_moves:
+			proposal = get_next_position(position, move)
+			if proposal.x < 0 or proposal.y < 0 or proposal.x >= width or proposal.y >= height: continue
+			if self.distance(proposal) != distance - 1: continue
+			if is_road(proposal, self.grid) or is_goal(proposal, self.grid): return proposal
+		return position # every way downhill is blocked by another vehicle, so wait
+
+class DiscreteCivilianVehicle(DiscreteVehicle):
+	def __init__(self, position: DiscretePosition):
+		super().__init__(DiscreteVehicleType.civilian, position)
+
+	def compute_next_point(self) -> DiscretePosition:
+		return self.position
+
+class DiscreteEmergencyVehicle(DiscreteVehicle):
+	"""Goes down a DistanceField. Give the same field to several vehicles on one grid so that they share it."""
+	field: DistanceField
+
+	def __init__(self, position: DiscretePosition, field: DistanceField | None = None):
+		super().__init__(DiscreteVehicleType.emergency, position)
+		self.field = DistanceField() if field is None else field
+
+	def compute_next_point(self) -> DiscretePosition:
+		self.field.update(self.grid)
+		return self.field.next_position(self.position)
\ No newline at end of file
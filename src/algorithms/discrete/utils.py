@@ -1,4 +1,8 @@
+from array import array
 from enum import Enum
+from typing import Dict, List
+import numpy as np
+from ...models.discrete.ArrayGrid import ArrayGrid
 from ...models.discrete.utils import DiscretePosition, Grid, DiscreteSimulationCellType
 
 class MoveType(Enum):
@@ -15,9 +19,57 @@ def is_road(position: DiscretePosition, grid: Grid):
 def is_goal(position: DiscretePosition, grid: Grid):
 	return grid[position.y][position.x] == DiscreteSimulationCellType.goal
 
+def index_path(path: List[DiscretePosition]) -> Dict[DiscretePosition, int]:
+	"""Maps every position on the path to its (first) index so that a vehicle can find itself on the path in O(1)"""
+	indices: Dict[DiscretePosition, int] = {}
+	for index, position in enumerate(path):
+		indices.setdefault(position, index)
+	return indices
+
 def get_next_position(current_position: DiscretePosition, move: MoveType) -> DiscretePosition:
 	if move == MoveType.up: return DiscretePosition(current_position.x, current_position.y + 1)
 	if move == MoveType.down: return DiscretePosition(current_position.x, current_position.y - 1)
 	if move == MoveType.left: return DiscretePosition(current_position.x - 1, current_position.y)
 	if move == MoveType.right: return DiscretePosition(current_position.x + 1, current_position.y)
-	raise NotImplementedError
\ No newline at end of file
+	raise NotImplementedError
+
+# The graph searches below work on flat cell indices (y * width + x) rather than DiscretePosition objects.
+ROAD = DiscreteSimulationCellType.road.value
+GOAL = DiscreteSimulationCellType.goal.value
+NO_PARENT = -1
+
+def cell_codes(grid: Grid | ArrayGrid) -> np.ndarray:
+	"""Returns the int8 code (the value of DiscreteSimulationCellType) of every cell, indexed by [y, x]"""
+	if isinstance(grid, ArrayGrid): return grid.cells()
+	return np.array([[cell.value for cell in row] for row in grid], dtype=np.int8)
+
+def position_to_index(position: DiscretePosition, width: int) -> int:
+	return position.y * width + position.x
+
+def index_to_position(index: int, width: int) -> DiscretePosition:
+	return DiscretePosition(index % width, index // width)
+
+def neighbour_indices(index: int, width: int, size: int) -> List[int]:
+	"""Indices of the cells next to the given cell, in the same order as possible_moves"""
+	x = index % width
+	neighbours = []
+	if index + width < size: neighbours.append(index + width) # up
+	if x > 0: neighbours.append(index - 1) # left
+	if x < width - 1: neighbours.append(index + 1) # right
+	if index >= width: neighbours.append(index - width) # down
+	return neighbours
+
+def new_parents(size: int) -> array:
+	"""Parent pointer of every cell, to be filled in by a search"""
+	return array('i', [NO_PARENT]) * size
+
+def reconstruct_path(parents: array, start: int, end: int, width: int) -> List[DiscretePosition]:
+	"""Follows the parent pointers back from end to start. The path excludes start and includes end."""
+	path: List[DiscretePosition] = []
+	index = end
+	while index != start:
+		path.append(index_to_position(index, width))
+		index = parents[index]
+		assert index != NO_PARENT
+	path.reverse()
+	return path
\ No newline at end of file
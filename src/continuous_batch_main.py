@@ -0,0 +1,216 @@
+import contextlib
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+from .continuous_main import COMMUNICATION_RADIUS, PHYSICS_DT, PLANNING_DT, have_reached_goal
+from .algorithms.continuous import algorithm1, gaussian
+from .algorithms.continuous.algorithm1 import ArcCollisionMode, ContinuousCivilianVehicle, ContinuousEmergencyVehicle, Mode
+from .algorithms.continuous.errors import VehicleStuckError
+from .models.continuous.ContinuousSimulator import ContinuousSimulator, VehicleData
+from .models.continuous.ContinuousVehicle import CollisionMode
+from .models.continuous.FixedStepScheduler import FixedStepScheduler
+from .scenarios.continuous.scenario1 import scenario
+from .utils.results import write_columns
+
+@dataclass
+class ContinuousRunParameters:
+	mode: Mode
+	road_heading_sigma: float
+	emergency_avoid_sigma: float
+	civilian_avoid_sigma: float
+	civilian_speed: float
+	emergency_speed: float
+	num_poses_in_plan: int
+	collision_mode: CollisionMode = CollisionMode.test_points
+	arc_collision_mode: ArcCollisionMode = ArcCollisionMode.SPLIT
+
+@dataclass
+class ContinuousRunTask:
+	run_index: int
+	seed: int
+	parameters: ContinuousRunParameters
+	total_time: float # seconds of simulation
+
+@dataclass
+class ContinuousRunResult:
+	run_index: int
+	seed: int
+	mode: str
+	road_heading_sigma: float
+	emergency_avoid_sigma: float
+	civilian_avoid_sigma: float
+	civilian_speed: float
+	emergency_speed: float
+	num_poses_in_plan: int
+	collision_mode: str
+	arc_collision_mode: str
+	simulated_time: float # seconds simulated before the run ended
+	is_stuck: bool # a vehicle could not find a plan
+	emergency_goal_time: float # nan if not reached
+	civilian_goal_time: float # nan if not reached
+	wasted_proposal_count: int
+	broad_phase_candidate_count: int # observed vehicles considered by the arc collision checks
+	broad_phase_culled_count: int # how many of them the broad phase discarded
+	closest_distance_mean: float # distance from the emergency vehicles to the closest other vehicle
+	closest_distance_min: float
+	wall_time: float # seconds the run took
+
+def apply_parameters(parameters: ContinuousRunParameters):
+	"""Sets the module constants the planner reads. Every run sets all of them, so nothing leaks between runs in a worker."""
+	algorithm1.RUN_MODE = parameters.mode
+	algorithm1.NUM_POSES_IN_PLAN = parameters.num_poses_in_plan
+	algorithm1.CIVILIAN_SPEED = parameters.civilian_speed
+	algorithm1.EMERGENCY_SPEED = parameters.emergency_speed
+	algorithm1.COLLISION_MODE = parameters.collision_mode
+	algorithm1.ARC_COLLISION_MODE = parameters.arc_collision_mode
+	gaussian.ROAD_HEADING_SIGMA = parameters.road_heading_sigma
+	gaussian.EMERGENCY_AVOID_SIGMA = parameters.emergency_avoid_sigma
+	gaussian.CIVILIAN_AVOID_SIGMA = parameters.civilian_avoid_sigma
+
+def run(task: ContinuousRunTask) -> ContinuousRunResult:
+	"""Runs one simulation of scenario1 without printing or rendering, until both goals are reached or total_time"""
+	parameters = task.parameters
+	apply_parameters(parameters)
+	random.seed(task.seed)
+	np.random.seed(task.seed)
+	simulator = ContinuousSimulator(
+		scenario.obstacles,
+		[VehicleData(ContinuousCivilianVehicle(), c.position, c.velocity, 0) for c in scenario.civilians]
+		+ [VehicleData(ContinuousEmergencyVehicle(), e.position, e.velocity, 0) for e in scenario.emergencies],
+		COMMUNICATION_RADIUS,
+		seed=task.seed
+	)
+	scheduler = FixedStepScheduler(simulator, PHYSICS_DT, PLANNING_DT)
+
+	is_stuck = False
+	emergency_goal_time, civilian_goal_time = math.nan, math.nan
+	start = time.perf_counter()
+	with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull): # the planner prints its progress
+		while scheduler.time < task.total_time:
+			try:
+				scheduler.advance(PLANNING_DT)
+			except VehicleStuckError:
+				is_stuck = True
+				break
+			emergency_has_reached, civilians_have_reached = have_reached_goal(simulator.vehicles)
+			if emergency_has_reached and math.isnan(emergency_goal_time): emergency_goal_time = scheduler.time
+			if civilians_have_reached and math.isnan(civilian_goal_time): civilian_goal_time = scheduler.time
+			if not math.isnan(emergency_goal_time) and not math.isnan(civilian_goal_time): break
+	wall_time = time.perf_counter() - start
+
+	closest_distance = simulator.closest_car_to_emergency_distance
+	return ContinuousRunResult(
+		task.run_index,
+		task.seed,
+		parameters.mode.name,
+		parameters.road_heading_sigma,
+		parameters.emergency_avoid_sigma,
+		parameters.civilian_avoid_sigma,
+		parameters.civilian_speed,
+		parameters.emergency_speed,
+		parameters.num_poses_in_plan,
+		parameters.collision_mode.name,
+		parameters.arc_collision_mode.name,
+		scheduler.time,
+		is_stuck,
+		emergency_goal_time,
+		civilian_goal_time,
+		sum(v.object.wasted_proposal_count for v in simulator.vehicles),
+		sum(v.object.broad_phase_candidate_count for v in simulator.vehicles),
+		sum(v.object.broad_phase_culled_count for v in simulator.vehicles),
+		closest_distance.mean,
+		closest_distance.min,
+		wall_time,
+	)
+
+def run_batch(tasks: List[ContinuousRunTask], max_workers: int | None = None) -> List[ContinuousRunResult]:
+	"""Shards the runs across worker processes. The results are in the same order as the tasks."""
+	max_workers = max_workers or os.cpu_count() or 1
+	chunk_size = max(1, math.ceil(len(tasks) / (max_workers * 4)))
+	with ProcessPoolExecutor(max_workers) as executor:
+		return list(executor.map(run, tasks, chunksize=chunk_size))
+
+def parameter_grid(
+	modes: Iterable[Mode],
+	road_heading_sigmas: Iterable[float],
+	emergency_avoid_sigmas: Iterable[float],
+	civilian_avoid_sigmas: Iterable[float],
+	speeds: Iterable[Tuple[float, float]], # (civilian speed, emergency speed)
+	num_poses_in_plans: Iterable[int],
+	collision_modes: Iterable[CollisionMode] = (CollisionMode.test_points,),
+	arc_collision_modes: Iterable[ArcCollisionMode] = (ArcCollisionMode.SPLIT,),
+) -> List[ContinuousRunParameters]:
+	"""Every combination of the given values"""
+	return [
+		ContinuousRunParameters(
+			mode, road_sigma, emergency_sigma, civilian_sigma, civilian_speed, emergency_speed, num_poses, collision_mode, arc_collision_mode
+		)
+		for mode, road_sigma, emergency_sigma, civilian_sigma, (civilian_speed, emergency_speed), num_poses, collision_mode, arc_collision_mode
+		in itertools.product(
+			modes,
+			road_heading_sigmas,
+			emergency_avoid_sigmas,
+			civilian_avoid_sigmas,
+			speeds,
+			num_poses_in_plans,
+			collision_modes,
+			arc_collision_modes
+		)
+	]
+
+def sweep_tasks(grid: List[ContinuousRunParameters], seeds: Iterable[int], total_time: float) -> List[ContinuousRunTask]:
+	"""One run per combination of parameters and seed"""
+	combinations = [(p, s) for p in grid for s in seeds]
+	return [ContinuousRunTask(i, s, p, total_time) for i, (p, s) in enumerate(combinations)]
+
+SWEEP_MODES = [Mode.WITH_ROAD_DIRECTION, Mode.WITH_ROAD_AND_VEHICLES]
+SWEEP_ROAD_HEADING_SIGMAS = [np.pi / 32, np.pi / 16, np.pi / 8]
+SWEEP_EMERGENCY_AVOID_SIGMAS = [np.pi / 64]
+SWEEP_CIVILIAN_AVOID_SIGMAS = [np.pi / 64, np.pi / 32]
+SWEEP_SPEEDS = [(1, 2)] # (civilian speed, emergency speed)
+SWEEP_NUM_POSES_IN_PLAN = [3, 4]
+SWEEP_COLLISION_MODES = [CollisionMode.test_points] # add CollisionMode.separating_axis to compare the exact box overlap test
+SWEEP_ARC_COLLISION_MODES = [ArcCollisionMode.SPLIT] # add ArcCollisionMode.SWEPT to compare the swept corridor check
+SWEEP_SEEDS = range(5)
+SWEEP_TOTAL_TIME = 200
+
+def continuous_batch_main():
+	grid = parameter_grid(
+		SWEEP_MODES,
+		SWEEP_ROAD_HEADING_SIGMAS,
+		SWEEP_EMERGENCY_AVOID_SIGMAS,
+		SWEEP_CIVILIAN_AVOID_SIGMAS,
+		SWEEP_SPEEDS,
+		SWEEP_NUM_POSES_IN_PLAN,
+		SWEEP_COLLISION_MODES,
+		SWEEP_ARC_COLLISION_MODES
+	)
+	tasks = sweep_tasks(grid, SWEEP_SEEDS, SWEEP_TOTAL_TIME)
+
+	start = time.perf_counter()
+	results = run_batch(tasks)
+	print(f'{len(results)} runs done in {time.perf_counter() - start:.2f}s')
+	for mode in SWEEP_MODES:
+		runs = [r for r in results if r.mode == mode.name]
+		print(
+			f'{mode.name}: {sum(not math.isnan(r.emergency_goal_time) for r in runs)}/{len(runs)} E reached goal, ' +
+			f'{sum(r.is_stuck for r in runs)} stuck, ' +
+			f'mean wasted proposals = {np.mean([r.wasted_proposal_count for r in runs]):.1f}, ' +
+			f'culled {sum(r.broad_phase_culled_count for r in runs)}/{sum(r.broad_phase_candidate_count for r in runs)} vehicles'
+		)
+
+	results_path = os.path.join('results', 'continuous', datetime.now().strftime("%Y-%d-%m_%H-%M-%S") + '.npz')
+	write_columns(results_path, results)
+	print(f'results written to {results_path}')
+
+if __name__ == '__main__':
+	continuous_batch_main()
\ No newline at end of file
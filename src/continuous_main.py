@@ -1,5 +1,6 @@
-import copy
-from typing import List, Callable, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+from typing import Dict, List, Callable, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 import os
@@ -7,26 +8,32 @@ import os
 # imports for simulation
 from src.models.continuous.ContinuousVehicle import ContinuousVehicle, VehicleType
 from .models.continuous.ContinuousSimulator import ContinuousSimulator, VehicleData
+from .models.continuous.FixedStepScheduler import FixedStepScheduler
+from .models.continuous.OpenRoadSpawner import OpenRoadSpawner
+from .models.continuous.TrajectoryFile import TrajectoryWriter
+from .models.continuous.TrajectoryRecorder import TrajectoryFrame, TrajectoryRecorder
 from .algorithms.continuous.algorithm1 import ContinuousCivilianVehicle, ContinuousEmergencyVehicle, Algorithm1Vehicle
 from src.algorithms.continuous.errors import VehicleStuckError
 from .scenarios.continuous.scenario1 import scenario
 
 # imports for visualization
+import numpy as np
 from .utils.Vector2 import Vector2
 from .visualize.visualize import visualize_result, VisualisationCellType, Extent
 
 
-def get_visualization_cell_type(position: Vector2, vehicles: List[VehicleData]):
+def get_visualization_cell_type(position: Vector2, frame: TrajectoryFrame, shapes: Dict[VehicleType, ContinuousVehicle]):
+	"""shapes holds a vehicle of each type, whose contains gives the shape of the vehicles of that type"""
 	if scenario.position_is_in_obstacle(position): return VisualisationCellType.obstacle
-	for v in vehicles:
-		if v.object.contains(v.position_world_to_relative(position)):
-			if v.object.vehicle_type == VehicleType.emergency: return VisualisationCellType.emergency
-			if v.object.vehicle_type == VehicleType.civilian: return VisualisationCellType.civilian
+	for slot in np.flatnonzero(frame.alive):
+		vehicle_type = VehicleType(int(frame.vehicle_types[slot]))
+		cell_type = VisualisationCellType.emergency if vehicle_type == VehicleType.emergency else VisualisationCellType.civilian
+		vehicle_position = Vector2(*frame.positions[slot])
+		if shapes[vehicle_type].contains((position - vehicle_position).rotated_clockwise(-frame.headings[slot])): return cell_type
 
-		for future_pose in v.object.future_poses:
-			pose_position = v.position_relative_to_world(future_pose.pose.position)
-			if (position - pose_position).length < 0.5:
-				return VisualisationCellType.emergency if isinstance(v.object, ContinuousEmergencyVehicle) else VisualisationCellType.civilian
+		for x, y, _ in frame.plan_poses[slot]:
+			if np.isnan(x): break
+			if (position - Vector2(x, y)).length < 0.5: return cell_type
 
 	return VisualisationCellType.road
 
@@ -36,19 +43,64 @@ class SimulationSnapshot:
 	emergencies: List[ContinuousEmergencyVehicle]
 
 GOAL_DISTANCE = 100
+COMMUNICATION_RADIUS: float | None = None # vehicles only observe the vehicles within this distance. None means no limit.
+PHYSICS_DT = 0.02 # seconds between kinematics steps
+PLANNING_DT = 0.5 # seconds between planning steps. Must be a multiple of PHYSICS_DT.
+PLANNING_WORKERS: int | None = None # number of processes the vehicles plan in. None means they plan in this process.
+SEED: int | None = 0 # seeds the planning of each vehicle so runs are reproducible. None means the global random generator is used.
+OPEN_ROAD = False # civilians keep entering at the start of the road and leave past GOAL_DISTANCE
+OPEN_ROAD_LANE_XS = [-5, 0, 5]
+OPEN_ROAD_SPAWN_INTERVAL = 2 # seconds between civilians entering the road
+OPEN_ROAD_CLEARANCE = 6 # a civilian only enters if no vehicle is closer than this to its starting position
+OPEN_ROAD_SLOT_COUNT = 64 # most vehicles that can be on the road at once, for the recording
+def have_reached_goal(vehicles: List[VehicleData]) -> Tuple[bool, bool]:
+	"""Returns whether any emergency vehicle and whether all the civilian vehicles are past GOAL_DISTANCE"""
+	emergency_has_reached = False
+	civilians_have_reached = True
+	for vehicle_data in vehicles:
+		if vehicle_data.object.vehicle_type == VehicleType.emergency:
+			if vehicle_data.position.y > GOAL_DISTANCE: emergency_has_reached = True
+		if vehicle_data.object.vehicle_type == VehicleType.civilian:
+			if vehicle_data.position.y < GOAL_DISTANCE: civilians_have_reached = False
+	return emergency_has_reached, civilians_have_reached
+
 def continuous_main():
 	# given scenario, set up the simulator and the vehicles
+	planning_executor = None if PLANNING_WORKERS is None else ProcessPoolExecutor(PLANNING_WORKERS)
 	simulator = ContinuousSimulator(
-		scenario.position_is_in_obstacle,
+		scenario.obstacles,
 		[VehicleData(ContinuousCivilianVehicle(), c.position, c.velocity, 0) for c in scenario.civilians]
-		+ [VehicleData(ContinuousEmergencyVehicle(), e.position, e.velocity, 0) for e in scenario.emergencies]
+		+ [VehicleData(ContinuousEmergencyVehicle(), e.position, e.velocity, 0) for e in scenario.emergencies],
+		COMMUNICATION_RADIUS,
+		planning_executor,
+		SEED
 	)
 
-	# simulate
-	dt, total_time = 0.5, 200
-	n_iter = int(total_time / dt)
+	# simulate, saving a snapshot every planning step
+	scheduler = FixedStepScheduler(simulator, PHYSICS_DT, PLANNING_DT)
+	total_time = 200
+	n_iter = int(total_time / PLANNING_DT)
 	t = 0
-	data: List[List[VehicleData]] = []
+	iteration_name = 'r=10000,e=pi/32,c=10000'
+	save_directory = os.path.join('images', iteration_name, datetime.now().strftime("%Y-%d-%m_%H-%M-%S"))
+	os.makedirs(save_directory, exist_ok=True)
+	recorder = TrajectoryRecorder(
+		simulator,
+		sink=TrajectoryWriter(os.path.join(save_directory, 'trajectory.traj')),
+		slot_count=OPEN_ROAD_SLOT_COUNT if OPEN_ROAD else None
+	)
+	spawner = None
+	if OPEN_ROAD:
+		spawner = OpenRoadSpawner(
+			simulator,
+			ContinuousCivilianVehicle,
+			OPEN_ROAD_LANE_XS,
+			0,
+			GOAL_DISTANCE,
+			OPEN_ROAD_SPAWN_INTERVAL,
+			OPEN_ROAD_CLEARANCE,
+			Random(SEED)
+		)
 
 	# obstacle_maps: List[List[List[Tuple[float, float, float]]]] = []
 	iter_done = 0
@@ -57,29 +109,28 @@ def continuous_main():
 	for i in range(n_iter):
 		print(i)
 		try:
-			simulator.roll_forward(dt)
+			scheduler.advance(PLANNING_DT)
 		except (VehicleStuckError, KeyboardInterrupt):
 			print("\nFAIL")
 			break
 
 		iter_done = i + 1
-		data.append(copy.deepcopy(simulator.vehicles))
-
-		current_time = iter_done * dt
-		civilians_have_reached = True
-		for vehicle_data in simulator.vehicles:
-			if vehicle_data.object.vehicle_type == VehicleType.emergency:
-				if vehicle_data.position.y > GOAL_DISTANCE and emergency_goal_time is None:
-					emergency_goal_time = current_time
-			if vehicle_data.object.vehicle_type == VehicleType.civilian:
-				if vehicle_data.position.y < GOAL_DISTANCE:
-					civilians_have_reached = False
+		if spawner is not None: spawner.update(scheduler.time)
+		recorder.record(scheduler.time)
+
+		current_time = scheduler.time
+		emergency_has_reached, civilians_have_reached = have_reached_goal(simulator.vehicles)
+		if emergency_has_reached and emergency_goal_time is None:
+			emergency_goal_time = current_time
 		if civilians_have_reached and civilian_goal_time is None:
 			civilian_goal_time = current_time
 
 		if civilian_goal_time is not None and emergency_goal_time is not None:
 			print('\nSUCCESS: stopping simulation because all reached goal')
 			break
+		if spawner is not None and emergency_goal_time is not None:
+			print('\nSUCCESS: stopping simulation because E reached goal')
+			break
 
 		# colors: List[List[Tuple[float, float, float]]] = []
 		# obstacle_maps.append(colors)
@@ -92,39 +143,46 @@ def continuous_main():
 		# 		else:
 		# 			color: Tuple[float, float, float] = (200, 0, 0) if simulator.vehicles[-1].object.position_will_collide(Vector2(x, y), 0) else (0, 200, 0)
 		# 		row.append(color)
-		t += dt
+		t += PLANNING_DT
 		# print(f'\rt={t}', end='')
 
+	recorder.close()
+	if planning_executor is not None: planning_executor.shutdown()
+
 	total_wasted_proposal_count = 0
+	total_candidate_count = 0
+	total_culled_count = 0
 	for vehicle_data in simulator.vehicles:
 		vehicle: Algorithm1Vehicle = vehicle_data.object
 		total_wasted_proposal_count += vehicle.wasted_proposal_count
-	ave_closest_distance = sum(simulator.closest_car_to_emergency_distance)/len(simulator.closest_car_to_emergency_distance)
+		total_candidate_count += vehicle.broad_phase_candidate_count
+		total_culled_count += vehicle.broad_phase_culled_count
+	closest_distance = simulator.closest_car_to_emergency_distance
 	print_message = \
 		f'simulation complete with {iter_done} iterations\n' +\
 		f'E goal: {emergency_goal_time}s\n' +\
 		f'C goal: {civilian_goal_time}s\n' +\
 		f'Wasted proposals: {total_wasted_proposal_count}\n' +\
-		f'min distance average to E: {ave_closest_distance}'
+		f'Vehicles culled by the broad phase: {total_culled_count}/{total_candidate_count}\n' +\
+		(f'Civilians spawned: {spawner.spawn_count}, despawned: {spawner.despawn_count}\n' if spawner is not None else '') +\
+		f'min distance average to E: {closest_distance.mean}\n' +\
+		f'min distance to E: {closest_distance.min}'
 	print(print_message)
 	print('visualising...')
 
 	# visualize
-	iteration_name = 'r=10000,e=pi/32,c=10000'
-	save_directory = os.path.join('images', iteration_name, datetime.now().strftime("%Y-%d-%m_%H-%M-%S"))
-	os.makedirs(save_directory, exist_ok=True)
 	with open(os.path.join(save_directory, 'info.txt'), 'w') as f:
 		f.write(print_message)
 
-	for index, snapshot in enumerate(data):
-		emergency_vehicle_position: Vector2 | None = None
-		for vehicle_data in snapshot:
-			if vehicle_data.object.vehicle_type == VehicleType.emergency:
-				emergency_vehicle_position = vehicle_data.position
-		if emergency_vehicle_position is None: raise Exception('emergency vehicle position not found')
+	shapes = {VehicleType.civilian: ContinuousCivilianVehicle(), VehicleType.emergency: ContinuousEmergencyVehicle()}
+	for index in range(recorder.tick_count):
+		frame = recorder.frame(index)
+		emergency_slots = np.flatnonzero(frame.alive & (frame.vehicle_types == VehicleType.emergency.value))
+		if len(emergency_slots) == 0: raise Exception('emergency vehicle position not found')
+		emergency_vehicle_position = Vector2(*frame.positions[emergency_slots[0]])
 
 		visualize_result(
-			lambda x: get_visualization_cell_type(x, snapshot),
+			lambda x: get_visualization_cell_type(x, frame, shapes),
 			0.3,
 			Extent(
 				emergency_vehicle_position.x - 20,
@@ -0,0 +1,151 @@
+import functools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, List, Tuple
+
+import numpy as np
+
+from .discrete_main import Planner, planner_modules
+from .models.discrete.ArrayDiscreteSimulator import ArrayDiscreteSimulator
+from .models.discrete.DiscreteVehicle import DiscreteVehicle
+from .models.discrete.utils import DiscreteSimulationCellType
+from .scenarios.discrete.Scenario import Scenario
+from .scenarios.discrete.generator import generate_scenario
+from .scenarios.discrete.scenario1 import scenario as scenario1
+from .utils.results import write_columns
+
+ScenarioGenerator = Callable[[int], Scenario] # builds a scenario from a seed. Must be picklable (e.g. a module level function).
+
+@dataclass
+class DiscreteRunResult:
+	run_index: int
+	seed: int
+	planner: str
+	width: int
+	height: int
+	civilian_count: int
+	emergency_count: int
+	reached_goal: bool
+	ticks_to_goal: int # -1 if the emergency vehicles did not all reach the goal
+	path_length: int # total number of moves made by the emergency vehicles
+	planner_time: float # seconds spent in the emergency vehicles' compute_next_point
+	total_time: float # seconds spent rolling the simulation forward
+
+@dataclass
+class DiscreteRunTask:
+	run_index: int
+	seed: int
+	planner: Planner
+	max_ticks: int
+	scenario: Scenario | None = None
+	generator: ScenarioGenerator | None = None
+
+class PlannerTimer:
+	"""Replaces a vehicle's compute_next_point and accumulates the time spent in it"""
+	total: float
+
+	def __init__(self, vehicle: DiscreteVehicle):
+		self.total = 0.0
+		self._compute_next_point = vehicle.compute_next_point
+		vehicle.compute_next_point = self
+
+	def __call__(self):
+		start = time.perf_counter()
+		try:
+			return self._compute_next_point()
+		finally:
+			self.total += time.perf_counter() - start
+
+def run(task: DiscreteRunTask) -> DiscreteRunResult:
+	"""Runs one simulation until every emergency vehicle is on a goal cell or max_ticks is reached"""
+	random.seed(task.seed)
+	np.random.seed(task.seed)
+	scenario = task.scenario if task.scenario is not None else task.generator(task.seed)
+
+	planner = planner_modules[task.planner]
+	civilians = [planner.DiscreteCivilianVehicle(pos) for pos in scenario.civilian_positions]
+	emergencies = [planner.DiscreteEmergencyVehicle(pos) for pos in scenario.emergency_positions]
+	simulator = ArrayDiscreteSimulator(scenario.grid, [*civilians, *emergencies])
+	timers = [PlannerTimer(e) for e in emergencies]
+
+	def all_reached_goal():
+		return all(simulator.grid.static[e.position.y, e.position.x] == DiscreteSimulationCellType.goal.value for e in emergencies)
+
+	ticks_to_goal = 0 if all_reached_goal() else -1
+	path_length = 0
+	start = time.perf_counter()
+	for tick in range(task.max_ticks):
+		if ticks_to_goal >= 0: break
+		previous_positions = [e.position for e in emergencies]
+		simulator.roll_forward()
+		path_length += sum(e.position != p for e, p in zip(emergencies, previous_positions))
+		if all_reached_goal(): ticks_to_goal = tick + 1
+	total_time = time.perf_counter() - start
+
+	return DiscreteRunResult(
+		task.run_index,
+		task.seed,
+		task.planner.name,
+		simulator.grid.width,
+		simulator.grid.height,
+		len(civilians),
+		len(emergencies),
+		ticks_to_goal >= 0,
+		ticks_to_goal,
+		path_length,
+		sum(t.total for t in timers),
+		total_time,
+	)
+
+def run_batch(tasks: List[DiscreteRunTask], max_workers: int | None = None) -> List[DiscreteRunResult]:
+	"""Shards the runs across worker processes. The results are in the same order as the tasks."""
+	max_workers = max_workers or os.cpu_count() or 1
+	chunk_size = max(1, math.ceil(len(tasks) / (max_workers * 4)))
+	with ProcessPoolExecutor(max_workers) as executor:
+		return list(executor.map(run, tasks, chunksize=chunk_size))
+
+def scenario_tasks(scenarios: Iterable[Scenario], planners: Iterable[Planner], max_ticks: int, seed: int = 0) -> List[DiscreteRunTask]:
+	"""One run per scenario and planner. Run i is seeded with seed + i."""
+	combinations: List[Tuple[Scenario, Planner]] = [(s, p) for s in scenarios for p in planners]
+	return [DiscreteRunTask(i, seed + i, p, max_ticks, scenario=s) for i, (s, p) in enumerate(combinations)]
+
+def generated_tasks(generator: ScenarioGenerator, seeds: Iterable[int], planners: Iterable[Planner], max_ticks: int) -> List[DiscreteRunTask]:
+	"""One run per seed and planner. The scenario is generated from the seed inside the worker."""
+	combinations: List[Tuple[int, Planner]] = [(s, p) for s in seeds for p in planners]
+	return [DiscreteRunTask(i, s, p, max_ticks, generator=generator) for i, (s, p) in enumerate(combinations)]
+
+BENCHMARK_SIZES = [50, 100, 200] # width and height of the generated scenarios
+BENCHMARK_SEEDS = range(5)
+
+def discrete_batch_main():
+	tasks = scenario_tasks([scenario1], list(Planner), max_ticks=100)
+	# measure how the planners scale with the size of the map
+	for size in BENCHMARK_SIZES:
+		generator = functools.partial(generate_scenario, width=size, height=size)
+		tasks += generated_tasks(generator, BENCHMARK_SEEDS, list(Planner), max_ticks=4 * size)
+	for index, task in enumerate(tasks):
+		task.run_index = index
+
+	start = time.perf_counter()
+	results = run_batch(tasks)
+	print(f'{len(results)} runs done in {time.perf_counter() - start:.2f}s')
+	for planner in Planner:
+		for size in BENCHMARK_SIZES:
+			runs = [r for r in results if r.planner == planner.name and r.width == size + 2]
+			reached = [r for r in runs if r.reached_goal]
+			print(
+				f'{planner.name} {size}x{size}: {len(reached)}/{len(runs)} reached goal, ' +
+				f'mean planner time = {np.mean([r.planner_time for r in runs]):.4f}s'
+			)
+
+	results_path = os.path.join('results', 'discrete', datetime.now().strftime("%Y-%d-%m_%H-%M-%S") + '.npz')
+	write_columns(results_path, results)
+	print(f'results written to {results_path}')
+
+if __name__ == '__main__':
+	discrete_batch_main()
\ No newline at end of file
@@ -1,9 +1,12 @@
-import copy
-from typing import List
+from datetime import datetime
+from enum import Enum
+import os
 
 # imports for simulation
 from .models.discrete.DiscreteSimulator import DiscreteSimulator
-from .algorithms.discrete.breadth_first import DiscreteCivilianVehicle, DiscreteEmergencyVehicle
+from .models.discrete.ArrayDiscreteSimulator import ArrayDiscreteSimulator
+from .models.discrete.DiscreteRecorder import DiscreteRecorder
+from .algorithms.discrete import a_star, breadth_first, d_star_lite, depth_first, distance_field
 from .models.discrete.utils import DiscreteSimulationCellType, Grid
 from .scenarios.discrete.scenario1 import scenario, width as scenario_width, height as scenario_height
 
@@ -28,26 +31,51 @@ def get_visualization_cell_type(position: Vector2, grid: Grid) -> VisualisationC
 	if sim_cell_type == DiscreteSimulationCellType.goal: return VisualisationCellType.goal
 	raise NotImplementedError
 
+class Planner(Enum):
+	BREADTH_FIRST = 0
+	DEPTH_FIRST = 1
+	A_STAR = 2
+	DISTANCE_FIELD = 3
+	D_STAR_LITE = 4
+
+# each planner module provides its own DiscreteCivilianVehicle and DiscreteEmergencyVehicle
+planner_modules = {
+	Planner.BREADTH_FIRST: breadth_first,
+	Planner.DEPTH_FIRST: depth_first,
+	Planner.A_STAR: a_star,
+	Planner.DISTANCE_FIELD: distance_field,
+	Planner.D_STAR_LITE: d_star_lite,
+}
+
+PLANNER = Planner.BREADTH_FIRST
+USE_ARRAY_GRID = True # use the NumPy-backed grid, whose ticks scale with the number of vehicles rather than cells
+
 def discrete_main():
 	# given scenario, set up the simulator and the vehicles
-	civilians = [DiscreteCivilianVehicle(pos) for pos in scenario.civilian_positions]
-	emergencies = [DiscreteEmergencyVehicle(pos) for pos in scenario.emergency_positions]
-	simulator = DiscreteSimulator(scenario.grid, [*civilians, *emergencies])
+	planner = planner_modules[PLANNER]
+	civilians = [planner.DiscreteCivilianVehicle(pos) for pos in scenario.civilian_positions]
+	emergencies = [planner.DiscreteEmergencyVehicle(pos) for pos in scenario.emergency_positions]
+	simulator_class = ArrayDiscreteSimulator if USE_ARRAY_GRID else DiscreteSimulator
+	simulator = simulator_class(scenario.grid, [*civilians, *emergencies])
 
 	# simulate
 	n_iter = 15
-	data: List[Grid] = [copy.deepcopy(simulator.grid)]
+	recorder = DiscreteRecorder(simulator)
 	for i in range(n_iter):
 		simulator.roll_forward()
-		data.append(copy.deepcopy(simulator.grid))
+		recorder.record()
 		print(f'\riter = {i}', end='')
 
 	# visualize
-	for i in range(n_iter):
+	save_directory = os.path.join('images', 'discrete', datetime.now().strftime("%Y-%d-%m_%H-%M-%S"))
+	for i in range(recorder.tick_count):
+		grid = recorder.grid_at(i)
 		visualize_result(
-			lambda x: get_visualization_cell_type(x, data[i]),
+			lambda x: get_visualization_cell_type(x, grid),
 			1,
-			Extent(0, scenario_width + 2, 0, scenario_height + 2)
+			Extent(0, scenario_width + 2, 0, scenario_height + 2),
+			save_directory,
+			str(i)
 		)
 
 if __name__ == '__main__':
@@ -1,22 +1,84 @@
-from typing import List, Callable
+from concurrent.futures import Executor
 from dataclasses import dataclass
+from random import Random
+from typing import Dict, List, Callable, Tuple
 import numpy as np
-from .ContinuousVehicle import ContinuousVehicle, LateralDirection, ObservedVehicle, VehicleType
+from .ObstacleMap import ObstacleMap, RelativeObstacleMap
+from .ContinuousVehicle import BoxShape, ContinuousVehicle, FuturePlan, LateralDirection, ObservedVehicle, ObservedVehicles, VehicleType, box_half_extents_array
+from .SpatialIndex import SpatialIndex
+from .VehicleStates import VehicleStates
 from ...algorithms.continuous.utils.heading import clean_heading
+from ...utils.SlotMap import SlotMap
+from ...utils.StreamingStatistics import StreamingStatistics
 from ...utils.Vector2 import Vector2
+from ...utils.frames import heading_differences, world_to_relative
 
-@dataclass
 class VehicleData:
+	"""
+	A vehicle and its state in the world frame.
+	Once added to a ContinuousSimulator, the position, velocity and heading are stored in the simulator's VehicleStates.
+	"""
 	object: ContinuousVehicle
-	position: Vector2
-	velocity: Vector2
+	vehicle_id: int | None # key in the simulator's SlotMap, stable while the vehicle is in the simulator
+	_states: VehicleStates | None # None while not in a simulator
+	_index: int # row in _states
+	_position: Vector2 # only used while not in a simulator
+	_velocity: Vector2
 	_heading: float # between zero and two pi
 
+	def __init__(self, object: ContinuousVehicle, position: Vector2, velocity: Vector2, heading: float):
+		self.object = object
+		self.vehicle_id = None
+		self._states = None
+		self._index = -1
+		self._position = position
+		self._velocity = velocity
+		self._heading = clean_heading(heading)
+
+	@property
+	def position(self) -> Vector2:
+		if self._states is None: return self._position
+		x, y = self._states.positions[self._index]
+		return Vector2(x, y)
+
+	@position.setter
+	def position(self, value: Vector2):
+		if self._states is None: self._position = value
+		else: self._states.positions[self._index] = (value.x, value.y)
+
+	@property
+	def velocity(self) -> Vector2:
+		if self._states is None: return self._velocity
+		x, y = self._states.velocities[self._index]
+		return Vector2(x, y)
+
+	@velocity.setter
+	def velocity(self, value: Vector2):
+		if self._states is None: self._velocity = value
+		else: self._states.velocities[self._index] = (value.x, value.y)
+
 	@property
-	def heading(self): return self._heading
+	def heading(self) -> float:
+		if self._states is None: return self._heading
+		return self._states.headings[self._index]
 
 	@heading.setter
-	def heading(self, value: float): self._heading = clean_heading(value)
+	def heading(self, value: float):
+		if self._states is None: self._heading = clean_heading(value)
+		else: self._states.headings[self._index] = clean_heading(value)
+
+	def attach(self, states: VehicleStates):
+		"""Moves the state into a new row of states"""
+		assert self._states is None
+		self._index = states.add((self._position.x, self._position.y), (self._velocity.x, self._velocity.y), self._heading)
+		self._states = states
+
+	def detach(self):
+		"""Copies the state out of its row. The row itself is removed by the owner of the VehicleStates."""
+		assert self._states is not None
+		self._position, self._velocity, self._heading = self.position, self.velocity, self.heading
+		self._states = None
+		self._index = -1
 
 	def position_relative_to_world(self, relative_position: Vector2):
 		return relative_position.rotated_clockwise(self.heading) + self.position
@@ -30,82 +92,195 @@ class VehicleData:
 	def velocity_world_to_relative(self, world_velocity: Vector2):
 		return (world_velocity - self.velocity).rotated_clockwise(-self.heading)
 
+class RelativeObstacleFunction:
+	"""position_is_obstacle in the frame of a vehicle at the given pose. Picklable if position_is_obstacle is."""
+	position_is_obstacle: Callable[[Vector2], bool]
+	position: Vector2
+	heading: float
+
+	def __init__(self, position_is_obstacle: Callable[[Vector2], bool], position: Vector2, heading: float):
+		self.position_is_obstacle = position_is_obstacle
+		self.position = position
+		self.heading = heading
+
+	def __call__(self, relative_position: Vector2) -> bool:
+		return self.position_is_obstacle(relative_position.rotated_clockwise(self.heading) + self.position)
+
+@dataclass
+class PlanTask:
+	"""What a vehicle needs to plan, sent separately as the vehicle leaves it out when pickled"""
+	vehicle: ContinuousVehicle
+	observed_vehicles: List[ObservedVehicle] | ObservedVehicles
+	position_is_obstacle: Callable[[Vector2], bool]
+
+def plan_vehicle(task: PlanTask) -> ContinuousVehicle:
+	"""Runs update_control on the vehicle, possibly in another process, and returns the updated vehicle"""
+	task.vehicle.observed_vehicles = task.observed_vehicles
+	task.vehicle.position_is_obstacle = task.position_is_obstacle
+	task.vehicle.update_control()
+	return task.vehicle
+
 class ContinuousSimulator:
-	vehicles: List[VehicleData]
+	states: VehicleStates
 	position_is_obstacle: Callable[[Vector2], bool]
-	closest_car_to_emergency_distance: List[float]
+	closest_car_to_emergency_distance: StreamingStatistics
+	communication_radius: float | None # vehicles only observe the vehicles within this distance. None means no limit.
+	planning_executor: Executor | None # if given, the vehicles plan in parallel on it. None means one after the other.
+	seed: int | None # if given, each vehicle plans with a random generator seeded from (seed, plan_count, vehicle_id)
+	plan_count: int # number of calls to plan so far
+	_spatial_index: SpatialIndex | None
+	_vehicles: SlotMap[VehicleData] # its values are in the same order as the rows of states
 
-	def __init__(self, position_is_obstacle: Callable[[Vector2], bool], vehicles: List[VehicleData] = None):
-		self.closest_car_to_emergency_distance = []
+	def __init__(
+		self,
+		position_is_obstacle: Callable[[Vector2], bool],
+		vehicles: List[VehicleData] = None,
+		communication_radius: float | None = None,
+		planning_executor: Executor | None = None,
+		seed: int | None = None
+	):
+		"""
+		With a planning_executor, each vehicle plans from a snapshot of the others (see PlanTask).
+		A seed is needed for the results to be reproducible, as the order and process the vehicles plan in varies.
+		"""
+		self.closest_car_to_emergency_distance = StreamingStatistics()
 		self.position_is_obstacle = position_is_obstacle
-		self.vehicles = []
+		self.communication_radius = communication_radius
+		self.planning_executor = planning_executor
+		self.seed = seed
+		self.plan_count = 0
+		self._spatial_index = None if communication_radius is None else SpatialIndex(communication_radius)
+		self._vehicles = SlotMap()
+		self.states = VehicleStates()
 		if vehicles is not None:
 			for v in vehicles:
 				self.add_vehicle(v)
 
+	@property
+	def vehicles(self) -> List[VehicleData]:
+		"""The vehicles, in the same order as the rows of states. Do not modify the list."""
+		return self._vehicles.values
+
+	@property
+	def slot_count(self) -> int:
+		"""Number of slots for vehicles so far. SlotMap.slot_of(vehicle_id) is less than this."""
+		return self._vehicles.slot_count
+
+	def get_vehicle(self, vehicle_id: int) -> VehicleData:
+		return self._vehicles[vehicle_id]
+
 	def add_vehicle(self, vehicle: VehicleData):
-		assert vehicle not in self.vehicles
-		self.vehicles.append(vehicle)
+		vehicle.attach(self.states)
+		vehicle.vehicle_id = self._vehicles.insert(vehicle)
 
 	def remove_vehicle(self, vehicle: VehicleData):
-		assert vehicle in self.vehicles
-		delete_index = self.vehicles.index(vehicle)
-		del self.vehicles[delete_index]
+		"""Removes the vehicle in O(1) by moving the last vehicle into its place, so the order of the vehicles changes"""
+		index = vehicle._index
+		assert vehicle._states is self.states and self.vehicles[index] is vehicle
+		vehicle.detach()
+		# the slot map and the states both move their last entry into the hole
+		self.states.remove(index)
+		self._vehicles.remove(vehicle.vehicle_id)
+		if index < len(self.vehicles): self.vehicles[index]._index = index
+
+	def _observed_indices(self, index: int) -> np.ndarray:
+		"""Indices of the vehicles observed by the index-th vehicle, in increasing order"""
+		if self._spatial_index is None: indices = np.arange(len(self.vehicles))
+		else:
+			x, y = self.states.positions[index]
+			indices = self._spatial_index.query(x, y, self.communication_radius)
+		return indices[indices != index]
 
-	def update_observed_data(self):
-		"""Updates information held by each vehicle"""
-		for v1 in self.vehicles:
+	def update_observed_data(self, vehicles: List[VehicleData] | None = None):
+		"""Updates information held by the given vehicles (by default, all of them)"""
+		if self._spatial_index is not None: self._spatial_index.rebuild(self.states.positions)
+		positions, velocities, headings = self.states.positions, self.states.velocities, self.states.headings
+		# plans as they are before anyone replans, so the order the vehicles replan in does not matter
+		plans = [FuturePlan.from_future_poses(v.object.future_poses) for v in self.vehicles]
+		# shapes of the vehicles, as small objects rather than the vehicles themselves, so planning tasks pickle small
+		shapes: List[BoxShape | ContinuousVehicle] = []
+		box_shapes: Dict[Tuple[float, float], BoxShape] = {}
+		for v in self.vehicles:
+			half_extents = v.object.box_half_extents
+			if half_extents is None: shapes.append(v.object)
+			else: shapes.append(box_shapes.setdefault(half_extents, BoxShape(*half_extents)))
+
+		for v1 in self.vehicles if vehicles is None else vehicles:
 			# update observed vehicles
-			v1.object.observed_vehicles = []
-			for v2 in self.vehicles:
-				if v1 is v2: continue
-				# TODO limit the communication radius
-				relative_position = v1.position_world_to_relative(v2.position)
-				relative_velocity = v1.velocity_world_to_relative(v2.velocity)
-				relative_heading = v2.heading - v1.heading
-				# make sure relative heading is between -pi and pi
-				while relative_heading < -np.pi: relative_heading += 2 * np.pi
-				while relative_heading > np.pi: relative_heading -= 2 * np.pi
-
-				v1.object.observed_vehicles.append(ObservedVehicle(
-					v2.object.vehicle_type,
-					relative_position,
-					relative_velocity,
-					relative_heading,
-					v2.object.contains,
-					v2.object.pose_at_time
-				))
-
-			def position_is_obstacle_function_factory(vehicle_data: VehicleData):
-				return lambda x: self.position_is_obstacle(vehicle_data.position_relative_to_world(x))
+			index = v1._index
+			observed = self._observed_indices(index).tolist()
+			observed_objects = [self.vehicles[i].object for i in observed]
+			v1.object.observed_vehicles = ObservedVehicles(
+				[o.vehicle_type for o in observed_objects],
+				world_to_relative(positions[index], headings[index], positions[observed]),
+				world_to_relative(velocities[index], headings[index], velocities[observed]),
+				heading_differences(headings[observed], headings[index]),
+				[shapes[i].contains for i in observed],
+				[shapes[i].contains_points for i in observed],
+				box_half_extents_array([o.box_half_extents for o in observed_objects]),
+				np.array([o.max_speed for o in observed_objects], dtype=float),
+				[plans[i].pose_at_time for i in observed]
+			)
 
 			# update obstacle info
-			v1.object.position_is_obstacle = position_is_obstacle_function_factory(v1)
+			if isinstance(self.position_is_obstacle, ObstacleMap):
+				v1.object.position_is_obstacle = RelativeObstacleMap(self.position_is_obstacle, v1.position, v1.heading)
+			else:
+				v1.object.position_is_obstacle = RelativeObstacleFunction(self.position_is_obstacle, v1.position, v1.heading)
 
 			v1.object.road_heading = -v1.heading
 
-	def roll_forward(self, dt: float):
-		self.update_observed_data()
+	def plan(self, vehicles: List[VehicleData] | None = None):
+		"""Lets the given vehicles (by default, all of them) observe the others and replan"""
+		vehicles = self.vehicles if vehicles is None else vehicles
+		self.update_observed_data(vehicles)
+		if self.seed is not None:
+			for vehicle in vehicles:
+				vehicle.object.rng = Random(f'{self.seed}:{self.plan_count}:{vehicle.vehicle_id}')
+		self.plan_count += 1
 
-		# compute velocity and position based on the new observed data
-		for vehicle in self.vehicles:
-			vehicle.object.update_control()
-			control = vehicle.object.control
-			delta_distance = control.speed * dt
-			delta_heading = delta_distance / control.turn_radius * (1 if control.turn_direction == LateralDirection.right else -1)
-			average_heading = vehicle.heading + delta_heading / 2 # heading at halfway point
+		if self.planning_executor is None:
+			for vehicle in vehicles:
+				vehicle.object.update_control()
+			return
+
+		tasks = [PlanTask(v.object, v.object.observed_vehicles, v.object.position_is_obstacle) for v in vehicles]
+		# merge in the order of the vehicles. Objects planned in another process are copies, so copy their state back.
+		for vehicle, planned in zip(vehicles, self.planning_executor.map(plan_vehicle, tasks)):
+			if planned is not vehicle.object: vehicle.object.__dict__.update(planned.__getstate__())
 
-			# update velocity, position and heading
-			vehicle.velocity = Vector2(np.sin(average_heading), np.cos(average_heading)) * control.speed
-			vehicle.position += vehicle.velocity * dt
-			vehicle.heading += delta_heading
+	def track_plans(self, vehicles: List[VehicleData]):
+		"""Lets the given vehicles update their control to follow their current plan, without replanning"""
+		for vehicle in vehicles:
+			vehicle.object.track_plan()
 
+	def roll_forward(self, dt: float):
+		"""Replans every vehicle, then integrates by dt"""
+		self.plan()
+		self.integrate(dt)
+		self.update_closest_car_to_emergency_distance()
+
+	def integrate(self, dt: float):
+		"""Moves every vehicle by dt according to its current control"""
+		# update velocity, position and heading of all the vehicles in one step
+		controls = [vehicle.object.control for vehicle in self.vehicles]
+		speeds = np.fromiter((c.speed for c in controls), dtype=float, count=len(controls))
+		curvatures = np.fromiter(
+			((1 if c.turn_direction == LateralDirection.right else -1) / c.turn_radius for c in controls),
+			dtype=float,
+			count=len(controls)
+		)
+		self.states.integrate(speeds, curvatures, dt)
+
+		for vehicle in self.vehicles:
 			vehicle.object.roll_forward(dt)
 
-		for v1 in self.vehicles:
-			if v1.object.vehicle_type == VehicleType.emergency:
-				min_distance = np.Inf
-				for v2 in self.vehicles:
-					if v1 is v2: continue
-					min_distance = min(min_distance, (v2.position - v1.position).length)
-				self.closest_car_to_emergency_distance.append(min_distance)
\ No newline at end of file
+	def update_closest_car_to_emergency_distance(self):
+		"""Adds the distance from each emergency vehicle to the closest other vehicle. Called once per planning period."""
+		emergencies = [i for i, v in enumerate(self.vehicles) if v.object.vehicle_type == VehicleType.emergency]
+		if len(emergencies) == 0: return
+		positions = self.states.positions
+		offsets = positions[None, :, :] - positions[emergencies, None, :] # (number of emergency vehicles, number of vehicles, 2)
+		distances = np.sqrt(offsets[..., 0] ** 2 + offsets[..., 1] ** 2)
+		distances[np.arange(len(emergencies)), emergencies] = np.inf # not the distance to itself
+		self.closest_car_to_emergency_distance.add(distances.min(axis=1))
\ No newline at end of file
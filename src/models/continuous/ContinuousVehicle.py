@@ -1,5 +1,6 @@
 from __future__ import annotations
-from typing import List, Callable
+from random import Random
+from typing import List, Callable, Iterator, Sequence, Tuple
 from enum import Enum
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
@@ -9,12 +10,19 @@ import numpy as np
 from ...algorithms.continuous.utils.Arc import make_arc
 from ...algorithms.continuous.utils.Pose import Pose
 from ...algorithms.continuous.utils.heading import clean_heading
+from .ObstacleMap import ObstacleMap
 from ...utils.Vector2 import Vector2
+from ...utils.frames import relative_to_world, rotated_clockwise, world_to_relative
+from ...utils.oriented_boxes import boxes_overlap
 
 class VehicleType(Enum):
 	civilian = 0
 	emergency = 1
 
+class CollisionMode(Enum):
+	test_points = 0 # test the points of collision_test_points_local_frame against the observed vehicles
+	separating_axis = 1 # exact overlap test between the boxes of the vehicles, when they have one
+
 class LateralDirection(Enum):
 	left = 0
 	right = 1
@@ -36,20 +44,152 @@ class ObservedVehicle:
 	relative_velocity: Vector2
 	relative_heading: float # between -pi and pi
 	contains: Callable[[Vector2], bool] # copy of the contains function of the observed vehicle
+	contains_points: Callable[[np.ndarray], np.ndarray] # copy of the contains_points function of the observed vehicle
+	box_half_extents: Tuple[float, float] | None # box_half_extents of the observed vehicle
+	max_speed: float # max_speed of the observed vehicle
 	pose_at_time: Callable[[float], Pose | None]
 
+class ObservedVehicles(Sequence[ObservedVehicle]):
+	"""
+	The vehicles observed by a vehicle, stored as arrays (one row per observed vehicle).
+	Indexing or iterating builds the ObservedVehicle objects, once, for code that works on them one at a time.
+	"""
+	vehicle_types: List[VehicleType]
+	relative_positions: np.ndarray # (number of observed vehicles, 2)
+	relative_velocities: np.ndarray # (number of observed vehicles, 2)
+	relative_headings: np.ndarray # between -pi and pi
+	contains: List[Callable[[Vector2], bool]]
+	contains_points: List[Callable[[np.ndarray], np.ndarray]]
+	box_half_extents: np.ndarray # (number of observed vehicles, 2), nan for the vehicles without a box
+	max_speeds: np.ndarray
+	pose_at_time: List[Callable[[float], Pose | None]]
+	_items: List[ObservedVehicle] | None
+
+	def __init__(
+		self,
+		vehicle_types: List[VehicleType],
+		relative_positions: np.ndarray,
+		relative_velocities: np.ndarray,
+		relative_headings: np.ndarray,
+		contains: List[Callable[[Vector2], bool]],
+		contains_points: List[Callable[[np.ndarray], np.ndarray]],
+		box_half_extents: np.ndarray,
+		max_speeds: np.ndarray,
+		pose_at_time: List[Callable[[float], Pose | None]]
+	):
+		self.vehicle_types = vehicle_types
+		self.relative_positions = relative_positions
+		self.relative_velocities = relative_velocities
+		self.relative_headings = relative_headings
+		self.contains = contains
+		self.contains_points = contains_points
+		self.box_half_extents = box_half_extents
+		self.max_speeds = max_speeds
+		self.pose_at_time = pose_at_time
+		self._items = None
+
+	def _get_items(self) -> List[ObservedVehicle]:
+		if self._items is None:
+			self._items = [
+				ObservedVehicle(
+					vehicle_type,
+					Vector2(*position),
+					Vector2(*velocity),
+					heading,
+					contains,
+					contains_points,
+					None if np.isnan(half_extents[0]) else tuple(half_extents),
+					max_speed,
+					pose_at_time
+				)
+				for vehicle_type, position, velocity, heading, contains, contains_points, half_extents, max_speed, pose_at_time in zip(
+					self.vehicle_types,
+					self.relative_positions.tolist(),
+					self.relative_velocities.tolist(),
+					self.relative_headings.tolist(),
+					self.contains,
+					self.contains_points,
+					self.box_half_extents.tolist(),
+					self.max_speeds.tolist(),
+					self.pose_at_time
+				)
+			]
+		return self._items
+
+	def __len__(self) -> int: return len(self.vehicle_types)
+
+	def __getitem__(self, index: int) -> ObservedVehicle: return self._get_items()[index]
+
+	def __iter__(self) -> Iterator[ObservedVehicle]: return iter(self._get_items())
+
 @dataclass
 class FuturePose:
 	pose: Pose
 	time: float
 
+@dataclass
+class FuturePlan:
+	"""
+	Snapshot of the future poses of a vehicle, so others can read its plan while it replans.
+	It is kept as arrays so that it pickles small when sent to planning processes.
+	"""
+	times: np.ndarray # (number of poses,)
+	poses: np.ndarray # (number of poses, 3) as x, y, heading
+
+	@staticmethod
+	def from_future_poses(future_poses: List[FuturePose]) -> FuturePlan:
+		return FuturePlan(
+			np.array([p.time for p in future_poses], dtype=float),
+			np.array([(p.pose.position.x, p.pose.position.y, p.pose.heading) for p in future_poses], dtype=float).reshape(-1, 3)
+		)
+
+	def _future_pose(self, index: int) -> FuturePose:
+		x, y, heading = self.poses[index].tolist()
+		return FuturePose(Pose(Vector2(x, y), heading), float(self.times[index]))
+
+	def pose_at_time(self, time: float) -> Pose | None:
+		"""Returns the position at a given time in the future. Returns None if the plan does not cover the time given."""
+		later = np.flatnonzero(self.times >= time)
+		if len(later) == 0: return None
+		index = int(later[0])
+		future_pose = self._future_pose(index)
+		prev_future_pose = FuturePose(Pose.zero(), 0) if index == 0 else self._future_pose(index - 1)
+		arc = make_arc(prev_future_pose.pose, future_pose.pose.position)
+		time_proportion = (time - prev_future_pose.time) / (future_pose.time - prev_future_pose.time)
+		position = arc.point_on_arc(time_proportion)
+		heading = prev_future_pose.pose.heading + time_proportion + (future_pose.pose.heading - prev_future_pose.pose.heading)
+		return Pose(position, heading)
+
+class BoxShape:
+	"""
+	contains and contains_points of a vehicle whose shape is the box of its box_half_extents.
+	Observed vehicles are given these instead of the vehicle's own methods, which would drag the whole vehicle
+	along when pickled.
+	"""
+	half_width: float
+	half_length: float
+
+	def __init__(self, half_width: float, half_length: float):
+		self.half_width = half_width
+		self.half_length = half_length
+
+	def contains(self, position: Vector2) -> bool:
+		return -self.half_width < position.x < self.half_width and -self.half_length < position.y < self.half_length
+
+	def contains_points(self, positions: np.ndarray) -> np.ndarray:
+		x, y = positions[..., 0], positions[..., 1]
+		return (-self.half_width < x) & (x < self.half_width) & (-self.half_length < y) & (y < self.half_length)
+
 class ContinuousVehicle(ABC):
 	_vehicle_type: VehicleType
-	observed_vehicles: List[ObservedVehicle]
-	position_is_obstacle: Callable[[Vector2], bool] # returns whether the given relative position is in an obstacle
+	observed_vehicles: Sequence[ObservedVehicle] # usually ObservedVehicles
+	position_is_obstacle: Callable[[Vector2], bool] # returns whether the given relative position is in an obstacle. Can be an ObstacleMap.
 	control: Control = Control.zero()
+	rng: Random | None = None # random generator used for planning. None means the global one.
+	collision_mode: CollisionMode = CollisionMode.test_points
 	future_poses: List[FuturePose]
 	_road_heading: float
+	_test_points_cache: Tuple[List[Vector2], np.ndarray] | None = None # collision test points and their array
 
 	def __init__(self, vehicle_type: VehicleType):
 		self._vehicle_type = vehicle_type
@@ -57,6 +197,17 @@ class ContinuousVehicle(ABC):
 		self.observed_vehicles = []
 		self._road_heading = 0.0
 
+	def __getstate__(self):
+		# the observed data is left out when copying or pickling, so that copies do not drag in the other vehicles
+		state = self.__dict__.copy()
+		state.pop('observed_vehicles', None)
+		state.pop('position_is_obstacle', None)
+		return state
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.observed_vehicles = []
+
 	@property
 	def road_heading(self): return self._road_heading
 
@@ -80,44 +231,151 @@ class ContinuousVehicle(ABC):
 	def collision_test_points_local_frame(self, value: List[Vector2]):
 		raise NotImplementedError
 
-	def position_will_collide(self, relative_position: Vector2, relative_heading: float, time: float) -> bool:
+	@property
+	def box_half_extents(self) -> Tuple[float, float] | None:
+		"""
+		Half width and half length of the box this vehicle's contains describes, if it is a box centered on the vehicle.
+		None if the shape is not a box, in which case only its test points are used for collisions.
+		"""
+		return None
+
+	@property
+	def max_speed(self) -> float:
+		"""Upper bound of the speed of the vehicle along its plan, used to bound where it is between two times"""
+		return np.Inf
+
+	@property
+	def collision_test_points_array(self) -> np.ndarray:
+		"""collision_test_points_local_frame as an (N, 2) array, rebuilt only when the list is replaced"""
+		points = self.collision_test_points_local_frame
+		if self._test_points_cache is None or self._test_points_cache[0] is not points:
+			self._test_points_cache = (points, np.array([(p.x, p.y) for p in points], dtype=float).reshape(-1, 2))
+		return self._test_points_cache[1]
+
+	def position_will_collide(
+		self,
+		relative_position: Vector2,
+		relative_heading: float,
+		time: float,
+		candidates: np.ndarray | None = None
+	) -> bool:
 		"""
 		Returns whether the given position and heading (in the vehicle frame)
 		would collide with another vehicle or an obstacle.
+		All the test points are moved at once, and tested against each observed vehicle at once.
+		With CollisionMode.separating_axis, the boxes of the vehicles are tested for overlap instead,
+		and the test points are only used for the obstacles and the vehicles without a box.
 
 		:param relative_position:  the proposed position in the vehicle frame
 		:param relative_heading: relative heading at the proposed position
 		:param time: time at which we evaluate the collision
+		:param candidates: indices of the observed vehicles to test (e.g. found by vehicles_near). None means all of them.
+		"""
+		test_points = relative_position.np_array + rotated_clockwise(self.collision_test_points_array, relative_heading)
+		if self.points_are_in_obstacle(test_points): return True
+		return self.position_will_collide_with_vehicles(relative_position, relative_heading, time, test_points, candidates)
+
+	def points_are_in_obstacle(self, points: np.ndarray) -> bool:
+		"""Returns whether any of the (N, 2) points (in the vehicle frame) is in an obstacle"""
+		if isinstance(self.position_is_obstacle, ObstacleMap): return bool(np.any(self.position_is_obstacle.contains_points(points)))
+		for x, y in points.tolist():
+			if self.position_is_obstacle(Vector2(x, y)): return True
+		return False
+
+	def position_will_collide_with_vehicles(
+		self,
+		relative_position: Vector2,
+		relative_heading: float,
+		time: float,
+		test_points: np.ndarray | None = None,
+		candidates: np.ndarray | None = None
+	) -> bool:
 		"""
-		for p in self.collision_test_points_local_frame:
-			test_point = relative_position + p.rotated_clockwise(relative_heading)
-
-			# check for obstacle
-			if self.position_is_obstacle(test_point): return True
-
-			# check for other vehicles
-			for v in self.observed_vehicles:
-				other_vehicle_pose_at_t = v.pose_at_time(time)
-				# if the observed vehicle has no plan registered for time t, then ignore
-				if other_vehicle_pose_at_t is None: continue
-				# compute relative position of the test point w.r.t. the current position of the observed vehicle
-				vehicle_current_to_test_point = (test_point - v.relative_position).rotated_clockwise(-v.relative_heading)
-				# compute relative position of the test point w.r.t. the future position (at time t) of the observed vehicle
-				vehicle_at_t_to_test_point = (vehicle_current_to_test_point - other_vehicle_pose_at_t.position).rotated_clockwise(-other_vehicle_pose_at_t.heading)
-				if v.contains(vehicle_at_t_to_test_point): return True
+		The observed vehicles part of position_will_collide.
+		test_points are the collision test points moved to the given position, if they are already computed.
+		"""
+		# ignore the vehicles that have no plan registered for time t
+		planned, poses, _ = self._planned_poses(time, 0, candidates)
+		if len(planned) == 0: return False
+		positions, headings, contains_points, half_extents, _ = _observed_arrays(self.observed_vehicles)
+		future_positions = np.array([(pose.position.x, pose.position.y) for pose in poses])
+		future_headings = np.array([pose.heading for pose in poses])
+
+		if self.collision_mode == CollisionMode.separating_axis and self.box_half_extents is not None:
+			has_box = ~np.isnan(half_extents[planned, 0])
+			# boxes of the observed vehicles at time t, in this vehicle's frame
+			centers = relative_to_world(positions[planned], headings[planned], future_positions)
+			overlaps = boxes_overlap(
+				relative_position.np_array, relative_heading, np.array(self.box_half_extents),
+				centers, headings[planned] + future_headings, half_extents[planned]
+			)
+			if np.any(overlaps & has_box): return True
+			planned, future_positions, future_headings = planned[~has_box], future_positions[~has_box], future_headings[~has_box]
+			if len(planned) == 0: return False
+		if test_points is None:
+			test_points = relative_position.np_array + rotated_clockwise(self.collision_test_points_array, relative_heading)
+		# relative positions of the test points w.r.t. the current position of each observed vehicle,
+		# then w.r.t. its future position (at time t). (number of planned vehicles, number of test points, 2)
+		vehicle_current_to_test_points = world_to_relative(positions[planned, None], headings[planned, None], test_points)
+		vehicle_at_t_to_test_points = world_to_relative(future_positions[:, None], future_headings[:, None], vehicle_current_to_test_points)
+		for i, points in zip(planned, vehicle_at_t_to_test_points):
+			if contains_points[i](points).any(): return True
 		return False
 
+	def _planned_poses(
+		self,
+		time: float,
+		time_margin: float,
+		candidates: np.ndarray | None
+	) -> Tuple[np.ndarray, List[Pose], np.ndarray]:
+		"""
+		Indices of the candidate observed vehicles (by default, all of them) that have a plan registered for time,
+		and their poses then. With a time_margin, a vehicle whose plan ends before time gives its pose at
+		time - time_margin instead, which the returned bool array flags.
+		"""
+		functions = _pose_at_time_functions(self.observed_vehicles)
+		indices: List[int] = []
+		poses: List[Pose] = []
+		are_earlier: List[bool] = []
+		for i in range(len(functions)) if candidates is None else candidates.tolist():
+			pose, is_earlier = functions[i](time), False
+			if pose is None and time_margin > 0: pose, is_earlier = functions[i](time - time_margin), True
+			if pose is None: continue
+			indices.append(i)
+			poses.append(pose)
+			are_earlier.append(is_earlier)
+		return np.array(indices, dtype=int), poses, np.array(are_earlier, dtype=bool)
+
+	def vehicles_near(
+		self,
+		center: np.ndarray,
+		radius: float,
+		time: float,
+		time_margin: float,
+		candidates: np.ndarray | None = None
+	) -> np.ndarray:
+		"""
+		Broad phase: indices of the candidate observed vehicles (by default, all of them) that may come within radius
+		of center (in the vehicle frame) between time - time_margin and time + time_margin. Each observed vehicle is
+		bounded by a circle around its box at time, grown by how far its max_speed takes it in time_margin.
+		A vehicle whose plan ends before time is bounded from time - time_margin instead, with twice the margin.
+		Vehicles without a plan registered for the interval are left out, as position_will_collide ignores them.
+		"""
+		planned, poses, are_earlier = self._planned_poses(time, time_margin, candidates)
+		if len(planned) == 0: return planned
+		margins = np.where(are_earlier, 2 * time_margin, time_margin)
+		positions, headings, _, half_extents, max_speeds = _observed_arrays(self.observed_vehicles)
+		future_positions = np.array([(pose.position.x, pose.position.y) for pose in poses])
+		centers = relative_to_world(positions[planned], headings[planned], future_positions)
+		bounding_radii = np.hypot(half_extents[planned, 0], half_extents[planned, 1])
+		bounding_radii = np.where(np.isnan(bounding_radii), np.Inf, bounding_radii) # no box, no bound
+		if time_margin > 0: bounding_radii = bounding_radii + max_speeds[planned] * margins
+		distances = np.hypot(centers[:, 0] - center[0], centers[:, 1] - center[1])
+		return planned[distances < radius + bounding_radii]
+
 	def pose_at_time(self, time: float) -> Pose | None:
 		"""Returns its position at a given time in the future. Returns None if the plan does not cover the time given."""
-		for index, future_pose in enumerate(self.future_poses):
-			if future_pose.time < time: continue
-			prev_future_pose = FuturePose(Pose.zero(), 0) if index == 0 else self.future_poses[index - 1]
-			arc = make_arc(prev_future_pose.pose, future_pose.pose.position)
-			time_proportion = (time - prev_future_pose.time) / (future_pose.time - prev_future_pose.time)
-			position = arc.point_on_arc(time_proportion)
-			heading = prev_future_pose.pose.heading + time_proportion + (future_pose.pose.heading - prev_future_pose.pose.heading)
-			return Pose(position, heading)
-		return None
+		return FuturePlan.from_future_poses(self.future_poses).pose_at_time(time)
 
 	@abstractmethod
 	def contains(self, position: Vector2) -> bool:
@@ -126,14 +384,62 @@ class ContinuousVehicle(ABC):
 		"""
 		raise NotImplementedError
 
+	def contains_points(self, positions: np.ndarray) -> np.ndarray:
+		"""
+		Batched contains: positions is an (..., 2) array of positions in this vehicle's frame,
+		and the result is a bool array of the leading shape. Override it with a vectorized version.
+		"""
+		flat = [self.contains(Vector2(x, y)) for x, y in positions.reshape(-1, 2).tolist()]
+		return np.array(flat, dtype=bool).reshape(positions.shape[:-1])
+
 	# The following two methods will be used instead of compute_velocity when we incorporate the car dynamics.
 	@abstractmethod
 	def update_control(self) -> None:
 		"""This function should update the control at next time step"""
 		raise NotImplementedError
 
+	def track_plan(self) -> None:
+		"""
+		This function should update the control to follow the current plan, without replanning.
+		It is called between planning steps when the physics runs at a higher rate than the planning.
+		"""
+		return
+
+	def needs_replan(self) -> bool:
+		"""This function should return whether the vehicle must replan before the next planning step"""
+		return True
+
 	@abstractmethod
 	def roll_forward(self, dt: float) -> None:
 		"""This function updates any internal vehicle data after the simulator rolls forward by dt seconds"""
 		raise NotImplementedError
 
+
+
+def _pose_at_time_functions(observed: Sequence[ObservedVehicle]) -> List[Callable[[float], Pose | None]]:
+	if isinstance(observed, ObservedVehicles): return observed.pose_at_time
+	return [v.pose_at_time for v in observed]
+
+def _observed_arrays(
+	observed: Sequence[ObservedVehicle]
+) -> Tuple[np.ndarray, np.ndarray, List[Callable[[np.ndarray], np.ndarray]], np.ndarray, np.ndarray]:
+	"""Relative positions, relative headings, contains_points functions, box half extents and max speeds of the observed vehicles"""
+	if isinstance(observed, ObservedVehicles):
+		return (
+			observed.relative_positions,
+			observed.relative_headings,
+			observed.contains_points,
+			observed.box_half_extents,
+			observed.max_speeds
+		)
+	return (
+		np.array([(v.relative_position.x, v.relative_position.y) for v in observed]).reshape(-1, 2),
+		np.array([v.relative_heading for v in observed], dtype=float),
+		[v.contains_points for v in observed],
+		box_half_extents_array([v.box_half_extents for v in observed]),
+		np.array([v.max_speed for v in observed], dtype=float)
+	)
+
+def box_half_extents_array(box_half_extents: List[Tuple[float, float] | None]) -> np.ndarray:
+	"""(number of vehicles, 2) array of the given box half extents, nan for None"""
+	return np.array([(np.nan, np.nan) if e is None else e for e in box_half_extents], dtype=float).reshape(-1, 2)
\ No newline at end of file
@@ -0,0 +1,47 @@
+from .ContinuousSimulator import ContinuousSimulator
+
+class FixedStepScheduler:
+	"""
+	Runs a ContinuousSimulator with fixed physics steps of physics_dt, and replans every vehicle every planning_dt.
+	Between planning steps, vehicles follow their current plan, and only the ones that need it (e.g. whose plan
+	was invalidated) replan.
+	"""
+	simulator: ContinuousSimulator
+	physics_dt: float
+	planning_dt: float
+	step_count: int
+	_steps_per_plan: int
+
+	def __init__(self, simulator: ContinuousSimulator, physics_dt: float, planning_dt: float):
+		steps_per_plan = round(planning_dt / physics_dt)
+		assert steps_per_plan >= 1 and abs(steps_per_plan * physics_dt - planning_dt) < 1e-9, \
+			'planning_dt must be a multiple of physics_dt'
+		self.simulator = simulator
+		self.physics_dt = physics_dt
+		self.planning_dt = planning_dt
+		self.step_count = 0
+		self._steps_per_plan = steps_per_plan
+
+	@property
+	def time(self) -> float: return self.step_count * self.physics_dt
+
+	def step(self):
+		"""Runs one physics step, preceded by planning if it is due"""
+		vehicles = self.simulator.vehicles
+		if self.step_count % self._steps_per_plan == 0:
+			self.simulator.plan()
+		else:
+			replanning, tracking = [], []
+			for v in vehicles:
+				(replanning if v.object.needs_replan() else tracking).append(v)
+			if len(replanning) > 0: self.simulator.plan(replanning)
+			self.simulator.track_plans(tracking)
+		self.simulator.integrate(self.physics_dt)
+		self.step_count += 1
+		# sample at the end of each planning period, like roll_forward does
+		if self.step_count % self._steps_per_plan == 0: self.simulator.update_closest_car_to_emergency_distance()
+
+	def advance(self, duration: float):
+		"""Runs the physics steps covering the given duration"""
+		for _ in range(round(duration / self.physics_dt)):
+			self.step()
\ No newline at end of file
@@ -0,0 +1,93 @@
+from abc import ABC, abstractmethod
+from typing import Callable
+import numpy as np
+from ...utils.Vector2 import Vector2
+from ...utils.frames import relative_to_world
+
+class ObstacleMap(ABC):
+	"""
+	Static obstacles that can be queried for many points at once. It is also a position_is_obstacle function,
+	so it can be given wherever one is expected.
+	"""
+
+	@abstractmethod
+	def contains_points(self, points: np.ndarray) -> np.ndarray:
+		"""points is an (..., 2) array of positions, and the result is a bool array of the leading shape"""
+		raise NotImplementedError
+
+	def contains_relative_points(self, origin: np.ndarray, heading: float, relative_points: np.ndarray) -> np.ndarray:
+		"""contains_points for points given in the frame of a vehicle at origin, facing heading"""
+		return self.contains_points(relative_to_world(origin, heading, relative_points))
+
+	def __call__(self, position: Vector2) -> bool:
+		return bool(self.contains_points(np.array([position.x, position.y])))
+
+class FunctionObstacleMap(ObstacleMap):
+	"""Obstacles given by a vectorized function, exact. Picklable if the function is."""
+	points_are_in_obstacle: Callable[[np.ndarray], np.ndarray]
+
+	def __init__(self, points_are_in_obstacle: Callable[[np.ndarray], np.ndarray]):
+		self.points_are_in_obstacle = points_are_in_obstacle
+
+	def contains_points(self, points: np.ndarray) -> np.ndarray:
+		return self.points_are_in_obstacle(np.asarray(points, dtype=float))
+
+class RasterObstacleMap(ObstacleMap):
+	"""
+	Obstacles sampled once on a grid of square cells: a point is in an obstacle if the center of its cell is.
+	Points outside the grid are in an obstacle if outside_is_obstacle.
+	"""
+	cells: np.ndarray # (number of rows, number of columns) bool, row i covers y_min + i * cell_size and up
+	x_min: float
+	y_min: float
+	cell_size: float
+	outside_is_obstacle: bool
+
+	def __init__(self, cells: np.ndarray, x_min: float, y_min: float, cell_size: float, outside_is_obstacle: bool = True):
+		self.cells = cells
+		self.x_min = x_min
+		self.y_min = y_min
+		self.cell_size = cell_size
+		self.outside_is_obstacle = outside_is_obstacle
+
+	@staticmethod
+	def from_function(
+		position_is_obstacle: Callable[[Vector2], bool],
+		x_min: float,
+		x_max: float,
+		y_min: float,
+		y_max: float,
+		cell_size: float,
+		outside_is_obstacle: bool = True
+	):
+		"""Samples position_is_obstacle at the center of each cell covering the given extent"""
+		column_count = int(np.ceil((x_max - x_min) / cell_size))
+		row_count = int(np.ceil((y_max - y_min) / cell_size))
+		xs = x_min + (np.arange(column_count) + 0.5) * cell_size
+		ys = y_min + (np.arange(row_count) + 0.5) * cell_size
+		cells = np.array([[position_is_obstacle(Vector2(x, y)) for x in xs] for y in ys], dtype=bool).reshape(row_count, column_count)
+		return RasterObstacleMap(cells, x_min, y_min, cell_size, outside_is_obstacle)
+
+	def contains_points(self, points: np.ndarray) -> np.ndarray:
+		points = np.asarray(points, dtype=float)
+		columns = np.floor((points[..., 0] - self.x_min) / self.cell_size).astype(int)
+		rows = np.floor((points[..., 1] - self.y_min) / self.cell_size).astype(int)
+		row_count, column_count = self.cells.shape
+		inside = (0 <= columns) & (columns < column_count) & (0 <= rows) & (rows < row_count)
+		result = np.full(inside.shape, self.outside_is_obstacle)
+		result[inside] = self.cells[rows[inside], columns[inside]]
+		return result
+
+class RelativeObstacleMap(ObstacleMap):
+	"""An obstacle map in the frame of a vehicle at the given pose. Picklable if obstacle_map is."""
+	obstacle_map: ObstacleMap
+	origin: np.ndarray
+	heading: float
+
+	def __init__(self, obstacle_map: ObstacleMap, position: Vector2, heading: float):
+		self.obstacle_map = obstacle_map
+		self.origin = position.np_array
+		self.heading = heading
+
+	def contains_points(self, points: np.ndarray) -> np.ndarray:
+		return self.obstacle_map.contains_relative_points(self.origin, self.heading, np.asarray(points, dtype=float))
\ No newline at end of file
@@ -0,0 +1,74 @@
+from random import Random
+from typing import Callable, List
+import numpy as np
+from .ContinuousSimulator import ContinuousSimulator, VehicleData
+from .ContinuousVehicle import ContinuousVehicle, VehicleType
+from ...utils.Vector2 import Vector2
+
+class OpenRoadSpawner:
+	"""
+	Streams civilian vehicles through a ContinuousSimulator: every spawn_interval seconds a civilian is added
+	at spawn_y in one of the lanes, and civilians past goal_y are removed, so long runs keep a bounded number of vehicles.
+	"""
+	simulator: ContinuousSimulator
+	make_civilian: Callable[[], ContinuousVehicle]
+	lane_xs: List[float]
+	spawn_y: float
+	goal_y: float
+	spawn_interval: float # seconds between spawns
+	clearance: float # a civilian is only spawned if no vehicle is closer than this to its position
+	rng: Random # picks the lane
+	spawn_count: int
+	despawn_count: int
+	_next_spawn_time: float
+
+	def __init__(
+		self,
+		simulator: ContinuousSimulator,
+		make_civilian: Callable[[], ContinuousVehicle],
+		lane_xs: List[float],
+		spawn_y: float,
+		goal_y: float,
+		spawn_interval: float,
+		clearance: float,
+		rng: Random
+	):
+		self.simulator = simulator
+		self.make_civilian = make_civilian
+		self.lane_xs = lane_xs
+		self.spawn_y = spawn_y
+		self.goal_y = goal_y
+		self.spawn_interval = spawn_interval
+		self.clearance = clearance
+		self.rng = rng
+		self.spawn_count = 0
+		self.despawn_count = 0
+		self._next_spawn_time = 0
+
+	def update(self, time: float):
+		"""Call after each simulation step, with the simulated time"""
+		self.despawn()
+		if time >= self._next_spawn_time and self.spawn():
+			self._next_spawn_time = time + self.spawn_interval
+
+	def despawn(self):
+		"""Removes the civilians past goal_y"""
+		vehicles = self.simulator.vehicles
+		past_goal = self.simulator.states.positions[:, 1] > self.goal_y
+		leaving = [vehicles[i] for i in np.flatnonzero(past_goal) if vehicles[i].object.vehicle_type == VehicleType.civilian]
+		for vehicle in leaving:
+			self.simulator.remove_vehicle(vehicle)
+		self.despawn_count += len(leaving)
+
+	def spawn(self) -> bool:
+		"""Adds a civilian in a random lane that is clear. Returns False if no lane is clear."""
+		positions = self.simulator.states.positions
+		clear_lanes = [
+			x for x in self.lane_xs
+			if np.all(np.hypot(positions[:, 0] - x, positions[:, 1] - self.spawn_y) >= self.clearance)
+		]
+		if len(clear_lanes) == 0: return False
+		x = self.rng.choice(clear_lanes)
+		self.simulator.add_vehicle(VehicleData(self.make_civilian(), Vector2(x, self.spawn_y), Vector2(0, 0), 0))
+		self.spawn_count += 1
+		return True
\ No newline at end of file
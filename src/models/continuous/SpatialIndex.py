@@ -0,0 +1,53 @@
+from typing import Dict, Tuple
+import numpy as np
+
+class SpatialIndex:
+	"""
+	Uniform grid over a set of points, for finding the points within a radius of a position.
+	Rebuild it whenever the points move. Querying a radius close to cell_size checks at most nine cells.
+	"""
+	cell_size: float
+	_positions: np.ndarray # (number of points, 2)
+	_order: np.ndarray # point indices sorted by cell
+	_cells: Dict[Tuple[int, int], Tuple[int, int]] # cell -> (start, end) of its points in _order
+
+	def __init__(self, cell_size: float):
+		assert cell_size > 0
+		self.cell_size = cell_size
+		self._positions = np.zeros((0, 2))
+		self._order = np.zeros(0, dtype=np.int64)
+		self._cells = {}
+
+	def rebuild(self, positions: np.ndarray):
+		"""Indexes the given (number of points, 2) positions. Point i is the i-th row."""
+		self._positions = np.array(positions, dtype=float)
+		cells = np.floor(self._positions / self.cell_size).astype(np.int64)
+		self._order = np.lexsort((cells[:, 1], cells[:, 0]))
+		sorted_cells = cells[self._order]
+
+		# start of each run of points in the same cell
+		is_new_cell = np.ones(len(sorted_cells), dtype=bool)
+		is_new_cell[1:] = np.any(sorted_cells[1:] != sorted_cells[:-1], axis=1)
+		starts = np.flatnonzero(is_new_cell)
+		ends = np.append(starts[1:], len(sorted_cells))
+		self._cells = {
+			(x, y): (start, end)
+			for (x, y), start, end in zip(sorted_cells[starts].tolist(), starts.tolist(), ends.tolist())
+		}
+
+	def query(self, x: float, y: float, radius: float) -> np.ndarray:
+		"""Returns the indices, in increasing order, of the points within radius of (x, y)"""
+		min_x, min_y = int(np.floor((x - radius) / self.cell_size)), int(np.floor((y - radius) / self.cell_size))
+		max_x, max_y = int(np.floor((x + radius) / self.cell_size)), int(np.floor((y + radius) / self.cell_size))
+		ranges = [
+			self._cells[(cell_x, cell_y)]
+			for cell_x in range(min_x, max_x + 1)
+			for cell_y in range(min_y, max_y + 1)
+			if (cell_x, cell_y) in self._cells
+		]
+		if len(ranges) == 0: return np.zeros(0, dtype=np.int64)
+
+		candidates = np.concatenate([self._order[start:end] for start, end in ranges])
+		offsets = self._positions[candidates] - (x, y)
+		is_within = offsets[:, 0] ** 2 + offsets[:, 1] ** 2 <= radius ** 2
+		return np.sort(candidates[is_within])
\ No newline at end of file
@@ -0,0 +1,138 @@
+import struct
+from typing import BinaryIO, Dict
+import numpy as np
+from .TrajectoryRecorder import Chunk, ChunkSink, TrajectoryFrame
+
+# File layout, all little-endian:
+#   header: MAGIC, then uint32 version, slot count, max plan poses and header size in bytes
+#   one fixed-size record per tick (see tick_dtype): float64 time, then for each vehicle slot
+#     int64 vehicle id, int8 VehicleType value, bool alive, float64 position (x, y), velocity (x, y) and heading,
+#     then the plan section, if max plan poses is not 0:
+#     float64 (x, y, heading) of max plan poses poses per slot, nan where unused
+#   Slots without a vehicle have id -1, type -1, alive false and nan state.
+MAGIC = b'AEVTRAJ\0'
+VERSION = 1
+_HEADER = struct.Struct('<8sIIII')
+
+VEHICLE_DTYPE = np.dtype([
+	('vehicle_id', '<i8'),
+	('vehicle_type', 'i1'),
+	('alive', '?'),
+	('position', '<f8', (2,)),
+	('velocity', '<f8', (2,)),
+	('heading', '<f8')
+])
+
+def tick_dtype(slot_count: int, max_plan_poses: int) -> np.dtype:
+	fields = [('time', '<f8'), ('vehicles', VEHICLE_DTYPE, (slot_count,))]
+	if max_plan_poses > 0: fields.append(('plan_poses', '<f8', (slot_count, max_plan_poses, 3)))
+	return np.dtype(fields)
+
+class TrajectoryWriter(ChunkSink):
+	"""Writes a recording to a single binary file (see the layout above). Use it as the sink of a TrajectoryRecorder."""
+	path: str
+	dtype: np.dtype | None # record of one tick, known once started
+	tick_count: int
+	_file: BinaryIO | None
+	_chunk_lengths: Dict[int, int] # first tick -> number of ticks of each chunk written
+
+	def __init__(self, path: str):
+		self.path = path
+		self.dtype = None
+		self.tick_count = 0
+		self._file = None
+		self._chunk_lengths = {}
+
+	def start(self, slot_count: int, max_plan_poses: int):
+		assert self._file is None
+		self.dtype = tick_dtype(slot_count, max_plan_poses)
+		self._file = open(self.path, 'wb')
+		self._file.write(_HEADER.pack(MAGIC, VERSION, slot_count, max_plan_poses, _HEADER.size))
+		self._file.flush()
+
+	def write(self, first_tick: int, chunk: Chunk):
+		assert first_tick == self.tick_count, 'chunks must be written in order'
+		records = np.zeros(len(chunk['time']), dtype=self.dtype)
+		records['time'] = chunk['time']
+		records['vehicles']['vehicle_id'] = chunk['vehicle_ids']
+		records['vehicles']['vehicle_type'] = chunk['vehicle_types']
+		records['vehicles']['alive'] = chunk['alive']
+		records['vehicles']['position'] = chunk['positions']
+		records['vehicles']['velocity'] = chunk['velocities']
+		records['vehicles']['heading'] = chunk['headings']
+		if 'plan_poses' in self.dtype.names: records['plan_poses'] = chunk['plan_poses']
+		self._file.write(records.tobytes())
+		self._file.flush() # so readers see every full chunk
+		self._chunk_lengths[first_tick] = len(records)
+		self.tick_count += len(records)
+
+	def read(self, first_tick: int) -> Chunk:
+		records = TrajectoryReader(self.path).records[first_tick:first_tick + self._chunk_lengths[first_tick]]
+		return records_to_chunk(records)
+
+	def close(self):
+		if self._file is not None: self._file.close()
+
+def records_to_chunk(records: np.ndarray) -> Chunk:
+	"""Converts tick records (see tick_dtype) to the columns of a TrajectoryRecorder chunk"""
+	vehicles = records['vehicles']
+	plan_poses = records['plan_poses'] if 'plan_poses' in records.dtype.names else np.zeros((*vehicles.shape, 0, 3))
+	return {
+		'time': np.array(records['time']),
+		'alive': np.array(vehicles['alive']),
+		'vehicle_ids': np.array(vehicles['vehicle_id']),
+		'vehicle_types': np.array(vehicles['vehicle_type']),
+		'positions': np.array(vehicles['position']),
+		'velocities': np.array(vehicles['velocity']),
+		'headings': np.array(vehicles['heading']),
+		'plan_poses': np.array(plan_poses),
+	}
+
+class TrajectoryReader:
+	"""
+	Memory-maps a file written by TrajectoryWriter. Only the ticks that are accessed are read from the disk.
+	A file that is still being written can be read: the ticks written so far are available.
+	"""
+	path: str
+	slot_count: int
+	max_plan_poses: int
+	records: np.ndarray # memory-mapped, one tick_dtype record per tick
+
+	def __init__(self, path: str):
+		self.path = path
+		with open(path, 'rb') as f:
+			magic, version, slot_count, max_plan_poses, header_size = _HEADER.unpack(f.read(_HEADER.size))
+			if magic != MAGIC: raise ValueError(f'{path} is not a trajectory file')
+			if version != VERSION: raise ValueError(f'{path} has version {version}, but version {VERSION} is expected')
+			f.seek(0, 2)
+			file_size = f.tell()
+		self.slot_count = slot_count
+		self.max_plan_poses = max_plan_poses
+		dtype = tick_dtype(slot_count, max_plan_poses)
+		tick_count = (file_size - header_size) // dtype.itemsize # ignores a partly written tick
+		if tick_count == 0: self.records = np.zeros(0, dtype=dtype)
+		else: self.records = np.memmap(path, dtype=dtype, mode='r', offset=header_size, shape=(tick_count,))
+
+	@property
+	def tick_count(self) -> int: return len(self.records)
+
+	def frame(self, tick: int) -> TrajectoryFrame:
+		"""Reads the state recorded at the given tick"""
+		assert 0 <= tick < self.tick_count
+		record = self.records[tick]
+		vehicles = record['vehicles']
+		return TrajectoryFrame(
+			float(record['time']),
+			np.array(vehicles['alive']),
+			np.array(vehicles['vehicle_id']),
+			np.array(vehicles['vehicle_type']),
+			np.array(vehicles['position']),
+			np.array(vehicles['velocity']),
+			np.array(vehicles['heading']),
+			np.array(record['plan_poses']) if self.max_plan_poses > 0 else np.zeros((len(vehicles), 0, 3))
+		)
+
+	@property
+	def positions(self) -> np.ndarray:
+		"""(number of ticks, number of slots, 2) view on the file, for analysing whole runs. Empty slots are nan."""
+		return self.records['vehicles']['position']
\ No newline at end of file
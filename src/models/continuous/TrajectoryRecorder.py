@@ -0,0 +1,194 @@
+import os
+from dataclasses import dataclass
+from abc import ABC, abstractmethod
+from typing import Dict, List
+import numpy as np
+from .ContinuousSimulator import ContinuousSimulator
+from ...utils.SlotMap import SLOT_MASK
+from ...utils.frames import relative_to_world
+
+Chunk = Dict[str, np.ndarray] # column name -> array whose first axis is the tick within the chunk
+
+class ChunkSink(ABC):
+	"""Where a TrajectoryRecorder hands its full chunks"""
+
+	@abstractmethod
+	def start(self, slot_count: int, max_plan_poses: int):
+		"""Called once, when the recorder is created"""
+		raise NotImplementedError
+
+	@abstractmethod
+	def write(self, first_tick: int, chunk: Chunk):
+		"""Called with the chunks in order. All chunks are the recorder's chunk_size ticks long, except maybe the last one."""
+		raise NotImplementedError
+
+	@abstractmethod
+	def read(self, first_tick: int) -> Chunk:
+		"""Returns the chunk written with the given first tick"""
+		raise NotImplementedError
+
+	@abstractmethod
+	def close(self):
+		raise NotImplementedError
+
+class NpzChunkSink(ChunkSink):
+	"""
+	Writes each chunk of a recording to its own .npz file in directory, named after its first tick.
+	The slot count and max_plan_poses go to header.npz.
+	"""
+	directory: str
+
+	def __init__(self, directory: str):
+		self.directory = directory
+		os.makedirs(directory, exist_ok=True)
+
+	def _path(self, first_tick: int) -> str:
+		return os.path.join(self.directory, f'{first_tick:010d}.npz')
+
+	def start(self, slot_count: int, max_plan_poses: int):
+		np.savez(os.path.join(self.directory, 'header.npz'), slot_count=slot_count, max_plan_poses=max_plan_poses)
+
+	def write(self, first_tick: int, chunk: Chunk):
+		np.savez(self._path(first_tick), **chunk)
+
+	def read(self, first_tick: int) -> Chunk:
+		with np.load(self._path(first_tick)) as data:
+			return {name: data[name] for name in data.files}
+
+	def close(self):
+		return
+
+@dataclass
+class TrajectoryFrame:
+	"""
+	State of the vehicles at one recorded tick, in the world frame.
+	Row i is the vehicle in slot i of the simulator (see SlotMap.slot_of), if alive[i]. The other rows are nan.
+	"""
+	time: float
+	alive: np.ndarray # (number of slots,) whether a vehicle is in the slot
+	vehicle_ids: np.ndarray # (number of slots,) vehicle_id of the vehicle in the slot, -1 if there is none
+	vehicle_types: np.ndarray # (number of slots,) VehicleType value of the vehicle in the slot, -1 if there is none
+	positions: np.ndarray # (number of slots, 2)
+	velocities: np.ndarray # (number of slots, 2)
+	headings: np.ndarray # (number of slots,)
+	plan_poses: np.ndarray # (number of slots, max_plan_poses, 3) as x, y, heading. Unused poses are nan.
+
+class TrajectoryRecorder:
+	"""
+	Records the state and the plans of the vehicles of a ContinuousSimulator into preallocated arrays,
+	chunk_size ticks at a time. Full chunks are kept in memory, or handed to sink if one is given.
+	Vehicles are recorded by slot, so they can be added and removed during the recording, as long as
+	their slots stay below slot_count.
+	"""
+	slot_count: int
+	max_plan_poses: int # poses after this many are not recorded
+	chunk_size: int
+	sink: ChunkSink | None
+	tick_count: int
+	_simulator: ContinuousSimulator
+	_chunk: Chunk # chunk being filled
+	_chunks: List[Chunk] # full chunks, if there is no sink
+	_loaded_chunk_index: int # chunk cached in _loaded_chunk, read back from the sink
+	_loaded_chunk: Chunk | None
+
+	def __init__(
+		self,
+		simulator: ContinuousSimulator,
+		max_plan_poses: int = 8,
+		chunk_size: int = 1024,
+		sink: ChunkSink | None = None,
+		slot_count: int | None = None
+	):
+		"""slot_count defaults to the slots the simulator uses so far, which is enough if no vehicle is added"""
+		self._simulator = simulator
+		self.slot_count = simulator.slot_count if slot_count is None else slot_count
+		self.max_plan_poses = max_plan_poses
+		self.chunk_size = chunk_size
+		self.sink = sink
+		self.tick_count = 0
+		self._chunk = self._new_chunk()
+		self._chunks = []
+		self._loaded_chunk_index = -1
+		self._loaded_chunk = None
+		if sink is not None: sink.start(self.slot_count, max_plan_poses)
+
+	def _new_chunk(self) -> Chunk:
+		n = self.slot_count
+		return {
+			'time': np.zeros(self.chunk_size),
+			'alive': np.zeros((self.chunk_size, n), dtype=bool),
+			'vehicle_ids': np.full((self.chunk_size, n), -1, dtype=np.int64),
+			'vehicle_types': np.full((self.chunk_size, n), -1, dtype=np.int8),
+			'positions': np.full((self.chunk_size, n, 2), np.nan),
+			'velocities': np.full((self.chunk_size, n, 2), np.nan),
+			'headings': np.full((self.chunk_size, n), np.nan),
+			'plan_poses': np.full((self.chunk_size, n, self.max_plan_poses, 3), np.nan),
+		}
+
+	def record(self, time: float):
+		"""Appends the current state of the vehicles as the next tick"""
+		row = self.tick_count % self.chunk_size
+		chunk = self._chunk
+		chunk['time'][row] = time
+		states = self._simulator.states
+		vehicles = self._simulator.vehicles
+		vehicle_ids = np.array([v.vehicle_id for v in vehicles], dtype=np.int64)
+		slots = vehicle_ids & SLOT_MASK # slot of the vehicle in each row of states
+		if len(slots) > 0 and slots.max() >= self.slot_count:
+			raise ValueError(f'a vehicle is in slot {slots.max()}, but only {self.slot_count} slots are recorded')
+		chunk['alive'][row, slots] = True
+		chunk['vehicle_ids'][row, slots] = vehicle_ids
+		chunk['vehicle_types'][row, slots] = [v.object.vehicle_type.value for v in vehicles]
+		chunk['positions'][row, slots] = states.positions
+		chunk['velocities'][row, slots] = states.velocities
+		chunk['headings'][row, slots] = states.headings
+
+		# plans are relative to the vehicle, so move them to the world frame
+		for i, v in enumerate(vehicles):
+			future_poses = v.object.future_poses[:self.max_plan_poses]
+			if len(future_poses) == 0: continue
+			relative = np.array([(p.pose.position.x, p.pose.position.y, p.pose.heading) for p in future_poses])
+			plan = chunk['plan_poses'][row, slots[i], :len(future_poses)]
+			plan[:, :2] = relative_to_world(states.positions[i], states.headings[i], relative[:, :2])
+			plan[:, 2] = np.mod(relative[:, 2] + states.headings[i], 2 * np.pi)
+
+		self.tick_count += 1
+		if self.tick_count % self.chunk_size == 0:
+			self._store_chunk(self._chunk)
+			self._chunk = self._new_chunk()
+
+	def _store_chunk(self, chunk: Chunk):
+		if self.sink is None: self._chunks.append(chunk)
+		else: self.sink.write(self.tick_count - self.chunk_size, chunk)
+
+	def close(self):
+		"""Hands the partly filled chunk to the sink and closes it. Call once the recording is over, if there is a sink."""
+		if self.sink is None: return
+		row_count = self.tick_count % self.chunk_size
+		if row_count > 0:
+			self.sink.write(self.tick_count - row_count, {name: column[:row_count] for name, column in self._chunk.items()})
+		self.sink.close()
+
+	def _get_chunk(self, chunk_index: int) -> Chunk:
+		if chunk_index == self.tick_count // self.chunk_size: return self._chunk
+		if self.sink is None: return self._chunks[chunk_index]
+		if chunk_index != self._loaded_chunk_index:
+			self._loaded_chunk = self.sink.read(chunk_index * self.chunk_size)
+			self._loaded_chunk_index = chunk_index
+		return self._loaded_chunk
+
+	def frame(self, tick: int) -> TrajectoryFrame:
+		"""Returns the state recorded at the given tick"""
+		assert 0 <= tick < self.tick_count
+		chunk = self._get_chunk(tick // self.chunk_size)
+		row = tick % self.chunk_size
+		return TrajectoryFrame(
+			float(chunk['time'][row]),
+			chunk['alive'][row],
+			chunk['vehicle_ids'][row],
+			chunk['vehicle_types'][row],
+			chunk['positions'][row],
+			chunk['velocities'][row],
+			chunk['headings'][row],
+			chunk['plan_poses'][row]
+		)
\ No newline at end of file
@@ -0,0 +1,72 @@
+import numpy as np
+
+class VehicleStates:
+	"""
+	Positions, velocities and headings of the vehicles in a simulator, stored as NumPy columns.
+	Row i holds the state of the i-th vehicle. Removing a row moves the last row into its place.
+	"""
+	_positions: np.ndarray # (capacity, 2)
+	_velocities: np.ndarray # (capacity, 2)
+	_headings: np.ndarray # (capacity,) between zero and two pi
+	count: int
+
+	def __init__(self, capacity: int = 16):
+		self._positions = np.zeros((capacity, 2))
+		self._velocities = np.zeros((capacity, 2))
+		self._headings = np.zeros(capacity)
+		self.count = 0
+
+	@property
+	def positions(self) -> np.ndarray: return self._positions[:self.count]
+
+	@property
+	def velocities(self) -> np.ndarray: return self._velocities[:self.count]
+
+	@property
+	def headings(self) -> np.ndarray: return self._headings[:self.count]
+
+	def _grow(self):
+		capacity = 2 * len(self._headings)
+		self._positions = np.resize(self._positions, (capacity, 2))
+		self._velocities = np.resize(self._velocities, (capacity, 2))
+		self._headings = np.resize(self._headings, capacity)
+
+	def add(self, position: np.ndarray, velocity: np.ndarray, heading: float) -> int:
+		"""Appends a row and returns its index"""
+		if self.count == len(self._headings): self._grow()
+		index = self.count
+		self._positions[index] = position
+		self._velocities[index] = velocity
+		self._headings[index] = heading
+		self.count += 1
+		return index
+
+	def remove(self, index: int) -> int | None:
+		"""Removes a row by moving the last row into its place. Returns the previous index of the moved row, if any."""
+		assert 0 <= index < self.count
+		last = self.count - 1
+		self.count -= 1
+		if index == last: return None
+		self._positions[index] = self._positions[last]
+		self._velocities[index] = self._velocities[last]
+		self._headings[index] = self._headings[last]
+		return last
+
+	def integrate(self, speeds: np.ndarray, curvatures: np.ndarray, dt: float):
+		"""
+		Moves every vehicle along an arc for dt seconds.
+		curvatures is one over the turn radius, positive when turning right (clockwise) and zero when going straight.
+		The velocity is taken at the heading halfway along the arc.
+		"""
+		delta_headings = speeds * dt * curvatures
+		average_headings = self.headings + delta_headings / 2 # heading at halfway point
+
+		velocities = self.velocities
+		velocities[:, 0] = np.sin(average_headings) * speeds
+		velocities[:, 1] = np.cos(average_headings) * speeds
+		positions = self.positions
+		positions += velocities * dt
+
+		headings = np.mod(self.headings + delta_headings, 2 * np.pi)
+		headings[headings >= 2 * np.pi] = 0 # np.mod can round tiny negative values up to two pi
+		self.headings[:] = headings
\ No newline at end of file
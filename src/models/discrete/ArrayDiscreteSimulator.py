@@ -0,0 +1,32 @@
+from typing import List, Tuple
+from .ArrayGrid import ArrayGrid
+from .DiscreteSimulator import DiscreteSimulator
+from .DiscreteVehicle import DiscreteVehicle
+from .utils import DiscreteSimulationCellType, Grid, DiscretePosition
+
+class ArrayDiscreteSimulator(DiscreteSimulator):
+	"""
+	DiscreteSimulator backed by an ArrayGrid.
+	Vehicles are painted on the occupancy layer, so the road, obstacle and goal cells underneath are never lost
+	and a full repaint only has to clear one array.
+	"""
+	grid: ArrayGrid
+
+	def __init__(self, grid: Grid | ArrayGrid, vehicles: List[DiscreteVehicle] = None):
+		super().__init__(grid if isinstance(grid, ArrayGrid) else ArrayGrid.from_grid(grid), vehicles)
+
+	def paint_cell(self, position: DiscretePosition, cell_type: DiscreteSimulationCellType):
+		self.grid.place(position, cell_type)
+
+	def clear_cell(self, position: DiscretePosition):
+		self.grid.clear(position)
+
+	def update_grid(self):
+		self.grid.clear_all()
+		self.occupancy.clear()
+		for v in self._vehicles.values():
+			self.occupy(v)
+
+	def move_vehicles(self, moves: List[Tuple[DiscreteVehicle, DiscretePosition]]):
+		self.grid.begin_changes()
+		super().move_vehicles(moves)
\ No newline at end of file
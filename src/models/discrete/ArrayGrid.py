@@ -0,0 +1,102 @@
+from __future__ import annotations
+from typing import Iterator, List, Tuple
+import numpy as np
+from .utils import DiscretePosition, DiscreteSimulationCellType, Grid
+
+EMPTY = -1 # occupancy value of a cell that has no vehicle on it
+
+# cell types indexed by their value so that an int8 code can be turned into an enum without a lookup
+_CELL_TYPES = tuple(sorted(DiscreteSimulationCellType, key=lambda c: c.value))
+
+class ArrayGridRow:
+	"""Read-only view of one row of an ArrayGrid so that the grid can be indexed like a Grid (grid[y][x])"""
+	def __init__(self, grid: ArrayGrid, y: int):
+		self._grid = grid
+		self._y = y
+
+	def __len__(self): return self._grid.width
+
+	def __getitem__(self, x: int) -> DiscreteSimulationCellType:
+		return self._grid.cell_type(x, self._y)
+
+	def __iter__(self) -> Iterator[DiscreteSimulationCellType]:
+		for x in range(self._grid.width):
+			yield self._grid.cell_type(x, self._y)
+
+class ArrayGrid:
+	"""
+	Grid stored as two int8 arrays indexed by [y, x].
+	The static layer holds road, obstacle and goal cells and never changes during a simulation.
+	The occupancy layer holds civilian and emergency cells (or EMPTY) and is updated one cell at a time.
+
+	Changes to the occupancy layer are journaled in batches so that planners can repair their plans incrementally.
+	changed_cells holds the (x, y) of every cell changed since the batch numbered version was started,
+	or None if the whole layer may have changed.
+	"""
+	static: np.ndarray
+	occupancy: np.ndarray
+	version: int
+	changed_cells: List[Tuple[int, int]] | None
+
+	def __init__(self, static: np.ndarray):
+		assert static.ndim == 2
+		self.static = np.array(static, dtype=np.int8)
+		self.occupancy = np.full(static.shape, EMPTY, dtype=np.int8)
+		self.version = 0
+		self.changed_cells = None
+
+	@staticmethod
+	def from_grid(grid: Grid) -> ArrayGrid:
+		"""Builds the static layer from a Grid. Any vehicles on the grid are treated as road."""
+		static = np.array([[cell.value for cell in row] for row in grid], dtype=np.int8)
+		is_vehicle = (static == DiscreteSimulationCellType.civilian.value) | (static == DiscreteSimulationCellType.emergency.value)
+		static[is_vehicle] = DiscreteSimulationCellType.road.value
+		return ArrayGrid(static)
+
+	def to_grid(self) -> Grid:
+		return [[_CELL_TYPES[code] for code in row] for row in self.cells().tolist()]
+
+	@property
+	def width(self): return self.static.shape[1]
+
+	@property
+	def height(self): return self.static.shape[0]
+
+	def __len__(self): return self.height
+
+	def __getitem__(self, y: int) -> ArrayGridRow:
+		return ArrayGridRow(self, y)
+
+	def __iter__(self) -> Iterator[ArrayGridRow]:
+		for y in range(self.height):
+			yield ArrayGridRow(self, y)
+
+	def cell_type(self, x: int, y: int) -> DiscreteSimulationCellType:
+		occupant = self.occupancy[y, x]
+		return _CELL_TYPES[self.static[y, x] if occupant == EMPTY else occupant]
+
+	def cells(self) -> np.ndarray:
+		"""Returns the combined int8 codes (the values of DiscreteSimulationCellType) of every cell"""
+		return np.where(self.occupancy == EMPTY, self.static, self.occupancy)
+
+	def is_occupied(self, position: DiscretePosition) -> bool:
+		return self.occupancy[position.y, position.x] != EMPTY
+
+	def place(self, position: DiscretePosition, cell_type: DiscreteSimulationCellType):
+		assert cell_type == DiscreteSimulationCellType.civilian or cell_type == DiscreteSimulationCellType.emergency
+		self.occupancy[position.y, position.x] = cell_type.value
+		if self.changed_cells is not None: self.changed_cells.append((position.x, position.y))
+
+	def clear(self, position: DiscretePosition):
+		self.occupancy[position.y, position.x] = EMPTY
+		if self.changed_cells is not None: self.changed_cells.append((position.x, position.y))
+
+	def clear_all(self):
+		self.occupancy.fill(EMPTY)
+		self.version += 1
+		self.changed_cells = None
+
+	def begin_changes(self):
+		"""Starts a new batch of journaled changes"""
+		self.version += 1
+		self.changed_cells = []
\ No newline at end of file
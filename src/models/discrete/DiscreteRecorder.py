@@ -0,0 +1,120 @@
+from array import array
+from typing import Dict, List
+import numpy as np
+from .ArrayGrid import EMPTY, ArrayGrid
+from .DiscreteSimulator import DiscreteSimulator
+from .DiscreteVehicle import DiscreteVehicle
+from .utils import DiscreteSimulationCellType, DiscreteVehicleType, Grid
+
+ABSENT = (-1, -1) # recorded position of a vehicle while it is not in the simulator. It is off the grid, so it is not drawn.
+
+class DiscreteRecorder:
+	"""
+	Records a discrete simulation as its static map, stored once, followed by the moves of the vehicles on every tick.
+	Tick 0 is the state when the recorder was created and tick n is the state after the n-th call to record.
+	Every keyframe_interval ticks the positions of all the vehicles are stored as well,
+	so reconstructing any tick only replays the moves since the closest keyframe.
+
+	Vehicles added to or removed from the simulator between ticks are recorded as moves from or to ABSENT,
+	so every vehicle that was ever in the simulator has a row in the positions, in the order they were first seen.
+	"""
+	static: np.ndarray # int8 codes of the road, obstacle and goal cells, indexed by [y, x]
+	cell_types: np.ndarray # int8 code each vehicle is drawn with
+	keyframe_interval: int
+	_simulator: DiscreteSimulator
+	_vehicles: List[DiscreteVehicle] # every vehicle recorded so far
+	_rows: Dict[int, int] # vehicle id -> row of the vehicle in the positions
+	_positions: np.ndarray # (number of vehicles, 2) positions as of the last record
+	_keyframes: Dict[int, np.ndarray] # tick -> positions of all the vehicles
+	_tick_starts: array # index of the first move of each tick. Moves of tick n are [starts[n - 1], starts[n]).
+	_moved_vehicles: array # index of the vehicle for each move
+	_moved_xs: array
+	_moved_ys: array
+
+	def __init__(self, simulator: DiscreteSimulator, keyframe_interval: int = 1000):
+		grid: Grid | ArrayGrid = simulator.grid
+		self.static = (grid if isinstance(grid, ArrayGrid) else ArrayGrid.from_grid(grid)).static.copy()
+		self.cell_types = np.zeros(0, dtype=np.int8)
+		self.keyframe_interval = keyframe_interval
+		self._simulator = simulator
+		self._vehicles = []
+		self._rows = {}
+		self._positions = np.zeros((0, 2), dtype=np.int32)
+		self._add_new_vehicles()
+		self._positions = self._current_positions()
+		self._keyframes = {0: self._positions.copy()}
+		self._tick_starts = array('q', [0])
+		self._moved_vehicles = array('i')
+		self._moved_xs = array('i')
+		self._moved_ys = array('i')
+
+	@property
+	def tick_count(self) -> int:
+		"""Number of ticks that can be reconstructed, including tick 0"""
+		return len(self._tick_starts)
+
+	def _add_new_vehicles(self):
+		"""Gives a row to the vehicles of the simulator that have not been recorded yet, as if they were ABSENT until now"""
+		new_vehicles = [v for v in self._simulator.vehicles if v.vehicle_id not in self._rows]
+		if len(new_vehicles) == 0: return
+		for v in new_vehicles:
+			self._rows[v.vehicle_id] = len(self._vehicles)
+			self._vehicles.append(v)
+		self.cell_types = np.concatenate((self.cell_types, np.array([
+			DiscreteSimulationCellType.civilian.value if v.vehicle_type == DiscreteVehicleType.civilian
+			else DiscreteSimulationCellType.emergency.value
+			for v in new_vehicles
+		], dtype=np.int8)))
+		self._positions = np.concatenate((self._positions, np.full((len(new_vehicles), 2), ABSENT, dtype=np.int32)))
+
+	def _current_positions(self) -> np.ndarray:
+		present = {v.vehicle_id for v in self._simulator.vehicles}
+		return np.array([
+			(v.position.x, v.position.y) if v.vehicle_id in present else ABSENT
+			for v in self._vehicles
+		], dtype=np.int32).reshape(-1, 2)
+
+	def record(self):
+		"""Records the moves (and the vehicles added or removed) since the last tick. Call after every roll_forward."""
+		self._add_new_vehicles()
+		positions = self._current_positions()
+		moved = np.flatnonzero(np.any(positions != self._positions, axis=1))
+		self._moved_vehicles.extend(moved.tolist())
+		self._moved_xs.extend(positions[moved, 0].tolist())
+		self._moved_ys.extend(positions[moved, 1].tolist())
+		self._tick_starts.append(len(self._moved_vehicles))
+		self._positions = positions
+
+		tick = self.tick_count - 1
+		if tick % self.keyframe_interval == 0: self._keyframes[tick] = positions.copy()
+
+	def positions_at(self, tick: int) -> np.ndarray:
+		"""Returns the (number of vehicles, 2) positions of the vehicles at the given tick, ABSENT if not in the simulator"""
+		assert 0 <= tick < self.tick_count
+		keyframe_tick = tick - tick % self.keyframe_interval
+		# vehicles recorded after the keyframe were absent then
+		keyframe = self._keyframes[keyframe_tick]
+		positions = np.full((len(self._vehicles), 2), ABSENT, dtype=np.int32)
+		positions[:len(keyframe)] = keyframe
+		start, end = self._tick_starts[keyframe_tick], self._tick_starts[tick]
+		if end > start:
+			# later moves overwrite earlier ones, so replaying them in order gives the final positions
+			vehicles = np.frombuffer(self._moved_vehicles, dtype=np.int32)[start:end]
+			positions[vehicles, 0] = np.frombuffer(self._moved_xs, dtype=np.int32)[start:end]
+			positions[vehicles, 1] = np.frombuffer(self._moved_ys, dtype=np.int32)[start:end]
+		return positions
+
+	def occupancy_at(self, tick: int) -> np.ndarray:
+		"""Returns the occupancy layer (see ArrayGrid) at the given tick"""
+		height, width = self.static.shape
+		positions = self.positions_at(tick)
+		in_grid = (positions[:, 0] >= 0) & (positions[:, 1] >= 0) & (positions[:, 0] < width) & (positions[:, 1] < height)
+		occupancy = np.full(self.static.shape, EMPTY, dtype=np.int8)
+		occupancy[positions[in_grid, 1], positions[in_grid, 0]] = self.cell_types[in_grid]
+		return occupancy
+
+	def grid_at(self, tick: int) -> ArrayGrid:
+		"""Reconstructs the grid at the given tick"""
+		grid = ArrayGrid(self.static)
+		grid.occupancy = self.occupancy_at(tick)
+		return grid
\ No newline at end of file
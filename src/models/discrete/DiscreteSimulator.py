@@ -1,14 +1,18 @@
 import copy
-from typing import List
+from typing import Dict, List, Tuple
 from .DiscreteVehicle import DiscreteVehicle
 from .utils import DiscreteSimulationCellType, DiscreteVehicleType, Grid, DiscretePosition
 
 class DiscreteSimulator:
-	vehicles: List[DiscreteVehicle]
 	grid: Grid
+	occupancy: Dict[DiscretePosition, int] # cell -> id of the vehicle on it
+	_vehicles: Dict[int, DiscreteVehicle] # id -> vehicle, in the order the vehicles were added
+	_next_vehicle_id: int
 
 	def __init__(self, grid: Grid, vehicles: List[DiscreteVehicle] = None):
-		self.vehicles = []
+		self._vehicles = {}
+		self._next_vehicle_id = 0
+		self.occupancy = {}
 		self.grid = copy.deepcopy(grid)
 
 		if vehicles is not None:
@@ -16,19 +20,50 @@ class DiscreteSimulator:
 				self.add_vehicle(v)
 		self.update_grid()
 
+	@property
+	def vehicles(self) -> List[DiscreteVehicle]: return list(self._vehicles.values())
+
 	def add_vehicle(self, vehicle: DiscreteVehicle):
-		self.vehicles.append(vehicle)
+		vehicle.vehicle_id = self._next_vehicle_id
+		self._next_vehicle_id += 1
+		self._vehicles[vehicle.vehicle_id] = vehicle
 		vehicle.grid = self.grid
+		self.occupy(vehicle)
 
 	def remove_vehicle(self, vehicle: DiscreteVehicle):
-		delete_index: None | int = None
-		for index, v in enumerate(self.vehicles):
-			if v is vehicle:
-				delete_index = index
-		assert delete_index is not None
-		del self.vehicles[delete_index]
+		assert self._vehicles.get(vehicle.vehicle_id) is vehicle
+		del self._vehicles[vehicle.vehicle_id]
+		self.vacate(vehicle, vehicle.position)
+
+	def vehicle_at(self, position: DiscretePosition) -> DiscreteVehicle | None:
+		vehicle_id = self.occupancy.get(position)
+		return None if vehicle_id is None else self._vehicles[vehicle_id]
+
+	def occupy(self, vehicle: DiscreteVehicle):
+		"""Puts the vehicle on the cell at its position"""
+		if not vehicle.is_in_grid(): return
+		assert vehicle.position not in self.occupancy # no collisions
+		self.occupancy[vehicle.position] = vehicle.vehicle_id
+		self.paint_cell(
+			vehicle.position,
+			DiscreteSimulationCellType.civilian if vehicle.vehicle_type == DiscreteVehicleType.civilian
+			else DiscreteSimulationCellType.emergency
+		)
+
+	def vacate(self, vehicle: DiscreteVehicle, position: DiscretePosition):
+		"""Takes the vehicle off the cell at the given position if it is there"""
+		if self.occupancy.get(position) != vehicle.vehicle_id: return
+		del self.occupancy[position]
+		self.clear_cell(position)
+
+	def paint_cell(self, position: DiscretePosition, cell_type: DiscreteSimulationCellType):
+		self.grid[position.y][position.x] = cell_type
+
+	def clear_cell(self, position: DiscretePosition):
+		self.grid[position.y][position.x] = DiscreteSimulationCellType.road
 
 	def update_grid(self):
+		"""Repaints every vehicle from scratch. roll_forward only updates the cells of the vehicles that moved."""
 		# reset any vehicles to road
 		for j, row in enumerate(self.grid):
 			for i, cell in enumerate(row):
@@ -36,19 +71,25 @@ class DiscreteSimulator:
 					self.grid[j][i] = DiscreteSimulationCellType.road
 
 		# put vehicles on the grid
-		for v in self.vehicles:
-			if not v.is_in_grid(): continue
-			i, j = v.position.x, v.position.y
-			assert self.grid[j][i] != DiscreteSimulationCellType.emergency # no collisions
-			assert self.grid[j][i] != DiscreteSimulationCellType.civilian # no collisions
-			self.grid[j][i] = \
-				DiscreteSimulationCellType.civilian if v.vehicle_type == DiscreteVehicleType.civilian \
-				else DiscreteSimulationCellType.emergency
+		self.occupancy.clear()
+		for v in self._vehicles.values():
+			self.occupy(v)
+
+	def move_vehicles(self, moves: List[Tuple[DiscreteVehicle, DiscretePosition]]):
+		"""Updates the occupancy of the vehicles that moved from the given previous positions"""
+		# vacate every cell first so that vehicles can follow each other
+		for vehicle, previous_position in moves:
+			self.vacate(vehicle, previous_position)
+		for vehicle, _ in moves:
+			self.occupy(vehicle)
 
 	def roll_forward(self):
-		for vehicle in self.vehicles:
+		moves: List[Tuple[DiscreteVehicle, DiscretePosition]] = []
+		for vehicle in self._vehicles.values():
+			previous_position = vehicle.position
 			vehicle._position = vehicle.compute_next_point()
-		self.update_grid()
+			if vehicle.position != previous_position: moves.append((vehicle, previous_position))
+		self.move_vehicles(moves)
 
 	def position_is_in_grid(self, position: DiscretePosition):
 		if position.x < 0 or position.y < 0: return False
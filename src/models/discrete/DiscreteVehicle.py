@@ -5,10 +5,12 @@ class DiscreteVehicle(ABC):
 	_vehicle_type: DiscreteVehicleType
 	_position: DiscretePosition
 	grid: Grid
+	vehicle_id: int | None # assigned by the simulator
 
 	def __init__(self, vehicle_type: DiscreteVehicleType, position: DiscretePosition):
 		self._vehicle_type = vehicle_type
 		self._position = position
+		self.vehicle_id = None
 
 	@property
 	def vehicle_type(self): return self._vehicle_type
@@ -2,7 +2,7 @@ from typing import List
 from enum import Enum
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(frozen=True)
 class DiscretePosition:
 	x: int
 	y: int
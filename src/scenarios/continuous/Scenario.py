@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from typing import List, Callable
+from ...models.continuous.ObstacleMap import ObstacleMap
 from ...utils.Vector2 import Vector2
 
 @dataclass
@@ -11,4 +12,10 @@ class VehicleInitializationInfo:
 class Scenario:
 	civilians: List[VehicleInitializationInfo]
 	emergencies: List[VehicleInitializationInfo]
-	position_is_in_obstacle: Callable[[Vector2], bool]
\ No newline at end of file
+	position_is_in_obstacle: Callable[[Vector2], bool]
+	obstacle_map: ObstacleMap | None = None # the same obstacles, for batch queries
+
+	@property
+	def obstacles(self) -> Callable[[Vector2], bool]:
+		"""What to give the simulator as position_is_obstacle: the obstacle map if there is one"""
+		return self.position_is_in_obstacle if self.obstacle_map is None else self.obstacle_map
\ No newline at end of file
@@ -1,5 +1,7 @@
 from typing import List
+import numpy as np
 from .Scenario import Scenario, VehicleInitializationInfo
+from ...models.continuous.ObstacleMap import FunctionObstacleMap
 from ...utils.Vector2 import Vector2
 
 civilians: List[VehicleInitializationInfo] = [
@@ -22,4 +24,9 @@ def position_is_in_obstacle(position: Vector2):
 		return position.y % 10 > 1 # add pocket on the side for visual clarity
 	return False
 
-scenario = Scenario(civilians, emergencies, position_is_in_obstacle)
\ No newline at end of file
+def points_are_in_obstacle(points: np.ndarray) -> np.ndarray:
+	"""Same as position_is_in_obstacle for an (..., 2) array of points"""
+	x, y = points[..., 0], points[..., 1]
+	return (x < -11) | (x > 11) | (((x < -10) | (x > 10)) & (y % 10 > 1))
+
+scenario = Scenario(civilians, emergencies, position_is_in_obstacle, FunctionObstacleMap(points_are_in_obstacle))
\ No newline at end of file
@@ -1,35 +1,36 @@
-import copy
 from typing import List
+from ...models.discrete.ArrayGrid import ArrayGrid
 from ...models.discrete.DiscreteSimulator import DiscreteSimulationCellType, DiscretePosition
 
 class Scenario:
 	civilian_positions: List[DiscretePosition]
 	emergency_positions: List[DiscretePosition]
-	grid: List[List[DiscreteSimulationCellType]]
+	grid: List[List[DiscreteSimulationCellType]] | ArrayGrid
 
 	def __init__(
 		self,
 		civilians: List[DiscretePosition],
 		emergencies: List[DiscretePosition],
-		grid: List[List[DiscreteSimulationCellType]]
+		grid: List[List[DiscreteSimulationCellType]] | ArrayGrid,
+		is_padded: bool = False
 	):
-		# surround the scenario with obstacle so the vehicles do not leave the grid
-		civilians_copy = copy.deepcopy(civilians)
-		for c in civilians_copy:
-			c.x += 1
-			c.y += 1
-		emergencies_copy = copy.deepcopy(emergencies)
-		for e in emergencies_copy:
-			e.x += 1
-			e.y += 1
-		grid_copy = copy.deepcopy(grid)
-		original_width = len(grid_copy[0])
-		for row in grid_copy:
-			row.insert(0, DiscreteSimulationCellType.obstacle)
-			row.append(DiscreteSimulationCellType.obstacle)
-		grid_copy.insert(0, [DiscreteSimulationCellType.obstacle for _ in range(original_width + 2)])
-		grid_copy.append([DiscreteSimulationCellType.obstacle for _ in range(original_width + 2)])
+		"""
+		If is_padded is False, the grid is surrounded with obstacle so the vehicles do not leave the grid
+		and the positions are shifted accordingly.
+		If it is True, the grid and the positions are used as they are, without copying.
+		"""
+		if is_padded:
+			self.civilian_positions = civilians
+			self.emergency_positions = emergencies
+			self.grid = grid
+			return
 
-		self.civilian_positions = civilians_copy
-		self.emergency_positions = emergencies_copy
-		self.grid = grid_copy
\ No newline at end of file
+		obstacle = DiscreteSimulationCellType.obstacle
+		original_width = len(grid[0])
+		self.civilian_positions = [DiscretePosition(c.x + 1, c.y + 1) for c in civilians]
+		self.emergency_positions = [DiscretePosition(e.x + 1, e.y + 1) for e in emergencies]
+		self.grid = [
+			[obstacle] * (original_width + 2),
+			*([obstacle, *row, obstacle] for row in grid),
+			[obstacle] * (original_width + 2),
+		]
\ No newline at end of file
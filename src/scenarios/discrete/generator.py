@@ -0,0 +1,53 @@
+import numpy as np
+from .Scenario import Scenario
+from ...models.discrete.ArrayGrid import ArrayGrid
+from ...models.discrete.utils import DiscretePosition, DiscreteSimulationCellType
+
+def generate_scenario(
+	seed: int,
+	width: int = 100,
+	height: int = 100,
+	lane_count: int = 3,
+	block_length: int = 20,
+	obstacle_density: float = 0.05,
+	civilian_density: float = 0.1,
+	emergency_count: int = 1,
+) -> Scenario:
+	"""
+	Generates a city-like scenario for benchmarking.
+	The map is made of parallel roads with lane_count lanes each, separated by one cell wide medians,
+	and joined by cross streets every block_length rows. The top row is the goal.
+	A proportion obstacle_density of the road cells (other than on the goal and starting rows) are blocked,
+	and a proportion civilian_density of the remaining road cells hold a civilian.
+	The emergency vehicles start on the bottom row.
+
+	The padded grid (with obstacles around the edge) is built directly as an ArrayGrid.
+	"""
+	rng = np.random.default_rng(seed)
+	road, obstacle, goal = (c.value for c in (DiscreteSimulationCellType.road, DiscreteSimulationCellType.obstacle, DiscreteSimulationCellType.goal))
+	static = np.full((height + 2, width + 2), obstacle, dtype=np.int8)
+	inside = static[1:-1, 1:-1] # view of the cells that are not padding
+
+	# roads and medians
+	is_lane = np.arange(width) % (lane_count + 1) < lane_count
+	inside[:, is_lane] = road
+	inside[::block_length, :] = road # cross streets
+
+	# random obstacles, leaving the starting row and the goal row clear
+	is_road_cell = inside == road
+	is_road_cell[[0, -1], :] = False
+	inside[is_road_cell & (rng.random(inside.shape) < obstacle_density)] = obstacle
+	inside[-1, is_lane] = goal
+
+	# vehicles
+	start_cells = np.flatnonzero(inside[0] == road)
+	emergency_xs = rng.choice(start_cells, size=min(emergency_count, start_cells.size), replace=False)
+	road_cells = np.flatnonzero(inside.ravel() == road)
+	road_cells = road_cells[~np.isin(road_cells, emergency_xs)] # emergency vehicles are on the first row, so their index is their x
+	civilian_count = int(round(civilian_density * road_cells.size))
+	civilian_cells = rng.choice(road_cells, size=civilian_count, replace=False)
+
+	# positions are in the padded grid, so shift by one
+	emergencies = [DiscretePosition(int(x) + 1, 1) for x in emergency_xs]
+	civilians = [DiscretePosition(int(i % width) + 1, int(i // width) + 1) for i in civilian_cells]
+	return Scenario(civilians, emergencies, ArrayGrid(static), is_padded=True)
\ No newline at end of file
@@ -0,0 +1,85 @@
+from typing import Generic, Iterator, List, TypeVar
+
+T = TypeVar('T')
+
+SLOT_BITS = 32
+SLOT_MASK = (1 << SLOT_BITS) - 1
+
+class SlotMap(Generic[T]):
+	"""
+	Stores values under stable keys, with O(1) insertion, removal and lookup.
+	A key packs the slot of the value and the generation of the slot (how many times it has been reused),
+	so the key of a removed value never finds the value that reuses its slot.
+	The values are also kept densely in values, in insertion order until a removal moves the last value into the hole.
+	"""
+	values: List[T]
+	_keys: List[int] # key of each value in values
+	_dense_indices: List[int] # index in values of the value in each slot, -1 if the slot is free
+	_generations: List[int]
+	_free_slots: List[int]
+
+	def __init__(self):
+		self.values = []
+		self._keys = []
+		self._dense_indices = []
+		self._generations = []
+		self._free_slots = []
+
+	@staticmethod
+	def slot_of(key: int) -> int: return key & SLOT_MASK
+
+	@property
+	def slot_count(self) -> int:
+		"""Number of slots, used or free. Slots are numbered from 0."""
+		return len(self._dense_indices)
+
+	def insert(self, value: T) -> int:
+		"""Stores the value and returns its key"""
+		if len(self._free_slots) > 0:
+			slot = self._free_slots.pop()
+		else:
+			slot = len(self._dense_indices)
+			self._dense_indices.append(-1)
+			self._generations.append(0)
+		key = (self._generations[slot] << SLOT_BITS) | slot
+		self._dense_indices[slot] = len(self.values)
+		self.values.append(value)
+		self._keys.append(key)
+		return key
+
+	def index_of(self, key: int) -> int:
+		"""Index of the value in values"""
+		if key not in self: raise KeyError(key)
+		return self._dense_indices[self.slot_of(key)]
+
+	def remove(self, key: int) -> T:
+		"""Removes the value by moving the last value of values into its place. Returns the removed value."""
+		index = self.index_of(key)
+		slot = self.slot_of(key)
+		value = self.values[index]
+
+		last_value, last_key = self.values.pop(), self._keys.pop()
+		if index < len(self.values):
+			self.values[index] = last_value
+			self._keys[index] = last_key
+			self._dense_indices[self.slot_of(last_key)] = index
+
+		self._dense_indices[slot] = -1
+		self._generations[slot] += 1
+		self._free_slots.append(slot)
+		return value
+
+	def key_at(self, index: int) -> int:
+		"""Key of values[index]"""
+		return self._keys[index]
+
+	def __getitem__(self, key: int) -> T: return self.values[self.index_of(key)]
+
+	def __contains__(self, key: int) -> bool:
+		slot = self.slot_of(key)
+		if slot >= len(self._dense_indices): return False
+		return self._dense_indices[slot] >= 0 and self._generations[slot] == key >> SLOT_BITS
+
+	def __len__(self) -> int: return len(self.values)
+
+	def __iter__(self) -> Iterator[T]: return iter(self.values)
\ No newline at end of file
@@ -0,0 +1,54 @@
+import numpy as np
+
+class StreamingStatistics:
+	"""
+	Count, mean, min and max of a stream of values, in constant memory.
+	The most recent values are also kept in a ring buffer for percentiles.
+	"""
+	count: int
+	total: float
+	min: float
+	max: float
+	_recent: np.ndarray
+	_next: int # where the next value goes in _recent
+
+	def __init__(self, recent_capacity: int = 1024):
+		assert recent_capacity > 0
+		self.count = 0
+		self.total = 0.0
+		self.min = np.inf
+		self.max = -np.inf
+		self._recent = np.zeros(recent_capacity)
+		self._next = 0
+
+	def add(self, values: np.ndarray | float):
+		values = np.atleast_1d(np.asarray(values, dtype=float))
+		if len(values) == 0: return
+		self.count += len(values)
+		self.total += float(values.sum())
+		self.min = min(self.min, float(values.min()))
+		self.max = max(self.max, float(values.max()))
+
+		# only the last capacity values can stay in the buffer
+		capacity = len(self._recent)
+		values = values[-capacity:]
+		indices = (self._next + np.arange(len(values))) % capacity
+		self._recent[indices] = values
+		self._next = (self._next + len(values)) % capacity
+
+	def __len__(self) -> int: return self.count
+
+	@property
+	def mean(self) -> float:
+		return self.total / self.count if self.count > 0 else np.nan
+
+	@property
+	def recent(self) -> np.ndarray:
+		"""The most recent values, oldest first"""
+		capacity = len(self._recent)
+		if self.count < capacity: return self._recent[:self.count].copy()
+		return np.roll(self._recent, -self._next)
+
+	def percentile(self, q: float) -> float:
+		"""Percentile (between 0 and 100) of the recent values"""
+		return float(np.percentile(self.recent, q)) if self.count > 0 else np.nan
\ No newline at end of file
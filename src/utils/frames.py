@@ -0,0 +1,25 @@
+import numpy as np
+
+# Batched versions of the frame changes done with Vector2.
+# Vectors are arrays whose last axis is (x, y), angles are arrays of the leading shape, and NumPy broadcasting applies.
+# e.g. one frame against (n, 2) points, or (n, 1, 2) frames against (1, n, 2) points for all pairs at once.
+
+def rotated_clockwise(vectors: np.ndarray, angles: np.ndarray | float) -> np.ndarray:
+	"""Same as Vector2.rotated_clockwise"""
+	sine, cosine = np.sin(angles), np.cos(angles)
+	x, y = vectors[..., 0], vectors[..., 1]
+	return np.stack((x * cosine + y * sine, -x * sine + y * cosine), axis=-1)
+
+def world_to_relative(origins: np.ndarray, headings: np.ndarray | float, world_vectors: np.ndarray) -> np.ndarray:
+	"""Expresses world positions (or velocities) relative to frames at origins (or moving at origins) facing headings"""
+	return rotated_clockwise(world_vectors - origins, -np.asarray(headings))
+
+def relative_to_world(origins: np.ndarray, headings: np.ndarray | float, relative_vectors: np.ndarray) -> np.ndarray:
+	"""Inverse of world_to_relative"""
+	return rotated_clockwise(relative_vectors, headings) + origins
+
+def heading_differences(headings: np.ndarray, reference_headings: np.ndarray | float) -> np.ndarray:
+	"""headings - reference_headings, for headings between zero and two pi, brought between -pi and pi"""
+	differences = headings - reference_headings
+	differences = np.where(differences < -np.pi, differences + 2 * np.pi, differences)
+	return np.where(differences > np.pi, differences - 2 * np.pi, differences)
\ No newline at end of file
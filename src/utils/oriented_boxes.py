@@ -0,0 +1,39 @@
+import numpy as np
+
+# Overlap tests between oriented rectangles, using the separating axis theorem.
+# A box is a center (x, y), a heading (same convention as Vector2.from_heading, the box's y axis points along it)
+# and half extents (half width along the box's x axis, half length along its y axis).
+# Like in frames.py, vectors are arrays whose last axis is (x, y), and NumPy broadcasting applies.
+
+def box_axes(headings: np.ndarray | float) -> np.ndarray:
+	"""(..., 2, 2) unit x and y axes of boxes with the given headings"""
+	sine, cosine = np.sin(headings), np.cos(headings)
+	x_axes = np.stack((cosine, -sine), axis=-1)
+	y_axes = np.stack((sine, cosine), axis=-1)
+	return np.stack((x_axes, y_axes), axis=-2)
+
+def boxes_overlap(
+	centers_a: np.ndarray,
+	headings_a: np.ndarray | float,
+	half_extents_a: np.ndarray,
+	centers_b: np.ndarray,
+	headings_b: np.ndarray | float,
+	half_extents_b: np.ndarray
+) -> np.ndarray:
+	"""
+	Whether each box a overlaps the matching box b. Boxes are open, so boxes that only touch do not overlap,
+	as with the strict inequalities of Algorithm1Vehicle.contains. One box inside the other overlaps.
+	"""
+	axes_a, axes_b = box_axes(headings_a), box_axes(headings_b)
+	axes_a, axes_b = np.broadcast_arrays(axes_a, axes_b)
+	axes = np.concatenate((axes_a, axes_b), axis=-2) # (..., 4, 2) candidate separating axes
+	offsets = np.asarray(centers_b) - np.asarray(centers_a)
+
+	def projected_radii(box_axes: np.ndarray, half_extents: np.ndarray) -> np.ndarray:
+		# (..., 4) half length of the projection of the box on each candidate axis
+		dots = np.abs(np.einsum('...ad,...kd->...ak', axes, box_axes)) # (..., 4, 2)
+		return np.sum(dots * np.asarray(half_extents)[..., None, :], axis=-1)
+
+	distances = np.abs(np.einsum('...ad,...d->...a', axes, offsets))
+	separated = distances >= projected_radii(axes_a, half_extents_a) + projected_radii(axes_b, half_extents_b)
+	return ~np.any(separated, axis=-1)
\ No newline at end of file
@@ -0,0 +1,18 @@
+import dataclasses
+import os
+from typing import Any, Dict, List
+import numpy as np
+
+def to_columns(rows: List[Any]) -> Dict[str, np.ndarray]:
+	"""Turns a list of dataclass instances into one array per field"""
+	assert len(rows) > 0
+	return {
+		field.name: np.array([getattr(row, field.name) for row in rows])
+		for field in dataclasses.fields(rows[0])
+	}
+
+def write_columns(path: str, rows: List[Any]):
+	"""Writes a list of dataclass instances to a .npz file with one array per field. Load it with np.load(path)."""
+	directory = os.path.dirname(path)
+	if directory != '': os.makedirs(directory, exist_ok=True)
+	np.savez(path, **to_columns(rows))
\ No newline at end of file
@@ -0,0 +1,90 @@
+import numpy as np
+
+from src.algorithms.discrete.breadth_first import solve_maze
+from src.algorithms.discrete.d_star_lite import DiscreteEmergencyVehicle, DStarLite
+from src.algorithms.discrete.utils import position_to_index
+from src.models.discrete.ArrayGrid import ArrayGrid
+from src.models.discrete.utils import DiscretePosition, DiscreteSimulationCellType
+
+ROAD = DiscreteSimulationCellType.road.value
+OBSTACLE = DiscreteSimulationCellType.obstacle.value
+GOAL = DiscreteSimulationCellType.goal.value
+START = DiscretePosition(0, 0)
+
+def random_static(seed: int, width: int = 12, height: int = 10, obstacle_ratio: float = 0.25) -> np.ndarray:
+	"""Road with random obstacles, goals on the top row and the start in the bottom left corner"""
+	rng = np.random.default_rng(seed)
+	static = np.where(rng.random((height, width)) < obstacle_ratio, OBSTACLE, ROAD).astype(np.int8)
+	static[-1, rng.choice(width, 3, replace=False)] = GOAL
+	static[START.y, START.x] = ROAD
+	return static
+
+def bfs_distance(grid: ArrayGrid, position: DiscretePosition) -> float:
+	path = solve_maze(grid, position)
+	return float('inf') if path is None else len(path)
+
+def planned_distance(vehicle: DiscreteEmergencyVehicle) -> float:
+	return vehicle.planner.g[vehicle.planner.start]
+
+def test_path_length_matches_breadth_first_search():
+	reachable_count = 0
+	for seed in range(30):
+		grid = ArrayGrid(random_static(seed))
+		planner = DStarLite(grid.cells(), START)
+		planner.compute_shortest_path()
+		assert planner.g[planner.start] == bfs_distance(grid, START)
+
+		# and following the plan takes that many steps
+		if planner.g[planner.start] == float('inf'): continue
+		reachable_count += 1
+		step_count, position = 0, START
+		while not planner.is_goal(position_to_index(position, planner.width)):
+			position = planner.next_position()
+			planner.move_start(position)
+			planner.compute_shortest_path()
+			step_count += 1
+		assert step_count == bfs_distance(grid, START)
+	assert reachable_count > 10
+
+def test_replans_after_cells_are_blocked_and_freed():
+	rng = np.random.default_rng(0)
+	for seed in range(10):
+		grid = ArrayGrid(random_static(seed, obstacle_ratio=0.1))
+		vehicle = DiscreteEmergencyVehicle(START)
+		vehicle.grid = grid
+		vehicle.compute_next_point()
+		planner = vehicle.planner
+		assert planned_distance(vehicle) == bfs_distance(grid, START)
+
+		blocked = []
+		for _ in range(20):
+			grid.begin_changes()
+			if len(blocked) > 0 and rng.random() < 0.4:
+				grid.clear(blocked.pop(rng.integers(len(blocked))))
+			else:
+				# block a road cell, preferably one on the current path
+				path = solve_maze(grid, START)
+				candidates = path[:-1] if path is not None and len(path) > 1 else []
+				if len(candidates) > 0:
+					cell = candidates[rng.integers(len(candidates))]
+					grid.place(cell, DiscreteSimulationCellType.civilian)
+					blocked.append(cell)
+			vehicle.compute_next_point()
+			assert vehicle.planner is planner # repaired, not rebuilt
+			assert planned_distance(vehicle) == bfs_distance(grid, START)
+
+def test_falls_back_to_a_full_replan_without_a_journal():
+	grid = ArrayGrid(random_static(3, obstacle_ratio=0.1))
+	vehicle = DiscreteEmergencyVehicle(START)
+	vehicle.grid = grid
+	vehicle.compute_next_point()
+	planner = vehicle.planner
+
+	# the next batch of changes is not journaled, but it is the one right after the batch the vehicle has seen
+	path = solve_maze(grid, START)
+	grid.clear_all()
+	grid.place(path[0], DiscreteSimulationCellType.civilian)
+	assert grid.changed_cells is None and grid.version == vehicle._synced_version + 1
+	vehicle.compute_next_point()
+	assert vehicle.planner is not planner
+	assert planned_distance(vehicle) == bfs_distance(grid, START)
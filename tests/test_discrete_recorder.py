@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from src.algorithms.discrete.breadth_first import DiscreteCivilianVehicle, DiscreteEmergencyVehicle
+from src.algorithms.discrete.utils import ROAD, cell_codes
+from src.models.discrete.ArrayDiscreteSimulator import ArrayDiscreteSimulator
+from src.models.discrete.DiscreteRecorder import DiscreteRecorder
+from src.models.discrete.DiscreteSimulator import DiscreteSimulator
+from src.models.discrete.utils import DiscretePosition
+from src.scenarios.discrete.generator import generate_scenario
+
+@pytest.mark.parametrize('simulator_class', [ArrayDiscreteSimulator, DiscreteSimulator])
+def test_recorded_grids_match_the_live_grids(simulator_class):
+	scenario = generate_scenario(0, width=12, height=16, block_length=5, civilian_density=0.1, emergency_count=2)
+	grid = scenario.grid if simulator_class is ArrayDiscreteSimulator else scenario.grid.to_grid()
+	civilians = [DiscreteCivilianVehicle(p) for p in scenario.civilian_positions]
+	emergencies = [DiscreteEmergencyVehicle(p) for p in scenario.emergency_positions]
+	simulator = simulator_class(grid, [*civilians, *emergencies])
+	recorder = DiscreteRecorder(simulator, keyframe_interval=4)
+
+	live_grids = [cell_codes(simulator.grid).copy()]
+	for tick in range(1, 13):
+		if tick == 3: simulator.remove_vehicle(civilians[0]) # between keyframes
+		if tick == 6:
+			# on a free road cell, far from the emergency vehicles
+			codes = cell_codes(simulator.grid)
+			y, x = np.argwhere(codes == ROAD)[-1]
+			simulator.add_vehicle(DiscreteCivilianVehicle(DiscretePosition(int(x), int(y))))
+		if tick == 8: simulator.remove_vehicle(civilians[1]) # on a keyframe
+		simulator.roll_forward()
+		recorder.record()
+		live_grids.append(cell_codes(simulator.grid).copy())
+
+	assert recorder.tick_count == len(live_grids)
+	assert len(recorder.positions_at(0)) == len(civilians) + len(emergencies) + 1
+	for tick, live_grid in enumerate(live_grids):
+		assert np.array_equal(recorder.grid_at(tick).cells(), live_grid), tick
+	# the emergency vehicles did move
+	assert not np.array_equal(recorder.grid_at(0).cells(), recorder.grid_at(12).cells())
@@ -0,0 +1,39 @@
+import numpy as np
+
+from src.algorithms.discrete.breadth_first import solve_maze
+from src.algorithms.discrete.distance_field import DiscreteEmergencyVehicle, DistanceField
+from src.models.discrete.ArrayDiscreteSimulator import ArrayDiscreteSimulator
+from src.models.discrete.utils import DiscreteSimulationCellType
+from src.scenarios.discrete.generator import generate_scenario
+
+def test_field_follows_the_civilians():
+	scenario = generate_scenario(1, width=12, height=16, block_length=5, civilian_density=0, emergency_count=1)
+	start = scenario.emergency_positions[0]
+	grid = scenario.grid
+	field = DistanceField(grid)
+	distances = field.distances
+	path = solve_maze(grid, start)
+	assert field.distance(start) == len(path)
+
+	# unchanged civilians keep the field
+	field.update(grid)
+	assert field.distances is distances
+
+	# a civilian on the path is an obstacle, and so is the field's view of it once updated
+	grid.begin_changes()
+	grid.place(path[len(path) // 2], DiscreteSimulationCellType.civilian)
+	field.update(grid)
+	assert field.distances is not distances
+	assert field.distance(start) == len(solve_maze(grid, start))
+
+def test_vehicles_share_a_field():
+	scenario = generate_scenario(2, width=12, height=16, block_length=5, civilian_density=0.05, emergency_count=2)
+	field = DistanceField()
+	emergencies = [DiscreteEmergencyVehicle(p, field) for p in scenario.emergency_positions]
+	simulator = ArrayDiscreteSimulator(scenario.grid, emergencies)
+	simulator.roll_forward()
+	assert field.grid is simulator.grid
+	distances = field.distances
+	simulator.roll_forward()
+	assert field.distances is distances # the emergency vehicles moved, but not the civilians
+	assert all(np.array_equal(v.field.distances, distances) for v in emergencies)
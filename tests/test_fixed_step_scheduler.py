@@ -0,0 +1,18 @@
+import contextlib
+import io
+
+from src.algorithms.continuous.algorithm1 import ContinuousCivilianVehicle, ContinuousEmergencyVehicle
+from src.models.continuous.ContinuousSimulator import ContinuousSimulator, VehicleData
+from src.models.continuous.FixedStepScheduler import FixedStepScheduler
+from src.scenarios.continuous.scenario1 import scenario
+from src.utils.Vector2 import Vector2
+
+def test_closest_distance_is_sampled_once_per_planning_period():
+	simulator = ContinuousSimulator(scenario.obstacles, [
+		VehicleData(ContinuousEmergencyVehicle(), Vector2(0, 0), Vector2(0, 0), 0),
+		VehicleData(ContinuousCivilianVehicle(), Vector2(0, 15), Vector2(0, 0), 0),
+	], seed=0)
+	scheduler = FixedStepScheduler(simulator, 0.02, 0.5)
+	with contextlib.redirect_stdout(io.StringIO()):
+		scheduler.advance(2)
+	assert simulator.closest_car_to_emergency_distance.count == 4
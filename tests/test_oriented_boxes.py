@@ -0,0 +1,28 @@
+import numpy as np
+
+from src.utils.oriented_boxes import boxes_overlap
+
+def test_touching_boxes_do_not_overlap():
+	# side by side, sharing the edge x = 1
+	assert not boxes_overlap(np.array([0, 0]), 0, np.array([1, 1.5]), np.array([2, 0]), 0, np.array([1, 1.5]))
+	# and end to end
+	assert not boxes_overlap(np.array([0, 0]), 0, np.array([1, 1.5]), np.array([0, 3]), 0, np.array([1, 1.5]))
+
+def test_contained_box_overlaps():
+	assert boxes_overlap(np.array([0, 0]), 0, np.array([1, 1.5]), np.array([0.2, -0.3]), 0.4, np.array([0.2, 0.3]))
+	assert boxes_overlap(np.array([0.2, -0.3]), 0.4, np.array([0.2, 0.3]), np.array([0, 0]), 0, np.array([1, 1.5]))
+
+def test_rotated_near_miss():
+	# a square turned 45 degrees facing the corner of an axis aligned square with one of its edges:
+	# the squares' own x and y axes do not separate them, only the turned square's axes do
+	diagonal = np.array([1, 1]) / np.sqrt(2)
+	gap = 0.05
+	center = np.array([1, 1]) + (1 + gap) * diagonal
+	assert not boxes_overlap(np.array([0, 0]), 0, np.array([1, 1]), center, np.pi / 4, np.array([1, 1]))
+	center = np.array([1, 1]) + (1 - gap) * diagonal
+	assert boxes_overlap(np.array([0, 0]), 0, np.array([1, 1]), center, np.pi / 4, np.array([1, 1]))
+
+def test_boxes_broadcast():
+	centers_b = np.array([[0, 0], [2, 0], [5, 0]])
+	overlaps = boxes_overlap(np.array([0, 0]), 0, np.array([1, 1.5]), centers_b, np.array([0.3, 0, 0]), np.array([1, 1.5]))
+	assert overlaps.tolist() == [True, False, False]
@@ -0,0 +1,39 @@
+import pickle
+from typing import List
+
+from src.algorithms.continuous.algorithm1 import ContinuousCivilianVehicle
+from src.models.continuous.ContinuousSimulator import ContinuousSimulator, PlanTask, VehicleData
+from src.scenarios.continuous.scenario1 import scenario
+from src.utils.Vector2 import Vector2
+
+def pickled_task_sizes(vehicle_count: int) -> List[int]:
+	"""Sizes of the pickled planning tasks of vehicle_count vehicles that all observe each other"""
+	simulator = ContinuousSimulator(
+		scenario.obstacles,
+		[VehicleData(ContinuousCivilianVehicle(), Vector2(5 * (i % 4), 6 * (i // 4)), Vector2(0, 0), 0) for i in range(vehicle_count)]
+	)
+	simulator.update_observed_data()
+	tasks = [PlanTask(v.object, v.object.observed_vehicles, v.object.position_is_obstacle) for v in simulator.vehicles]
+	return [len(pickle.dumps(task)) for task in tasks]
+
+def test_pickled_plan_task_grows_linearly_with_vehicle_count():
+	sizes = {n: max(pickled_task_sizes(n)) for n in (10, 20, 40, 80)}
+	bytes_per_vehicle = [(sizes[b] - sizes[a]) / (b - a) for a, b in ((10, 20), (20, 40), (40, 80))]
+	# the same cost for each observed vehicle, whatever the number of vehicles
+	assert max(bytes_per_vehicle) < 1.1 * min(bytes_per_vehicle)
+	# and only the data needed to plan against it, not the whole vehicle
+	assert max(bytes_per_vehicle) < 1000
+
+def test_unpickled_plan_task_sees_the_same_vehicles():
+	simulator = ContinuousSimulator(
+		scenario.obstacles,
+		[VehicleData(ContinuousCivilianVehicle(), Vector2(5 * (i % 4), 6 * (i // 4)), Vector2(0, 0), 0) for i in range(8)]
+	)
+	simulator.update_observed_data()
+	observed = simulator.vehicles[0].object.observed_vehicles
+	copy = pickle.loads(pickle.dumps(PlanTask(simulator.vehicles[0].object, observed, None))).observed_vehicles
+	for time in (0.5, 1.5, 3.0, 100.0):
+		for original, copied in zip(observed.pose_at_time, copy.pose_at_time):
+			assert original(time) == copied(time)
+	for position in (Vector2(0, 0), Vector2(0.9, 1.4), Vector2(1.1, 0), Vector2(0, -1.6)):
+		assert [c(position) for c in observed.contains] == [c(position) for c in copy.contains]
@@ -0,0 +1,39 @@
+import pytest
+
+from src.algorithms.continuous.algorithm1 import ContinuousCivilianVehicle
+from src.models.continuous.ContinuousSimulator import ContinuousSimulator, VehicleData
+from src.scenarios.continuous.scenario1 import scenario
+from src.utils.SlotMap import SlotMap
+from src.utils.Vector2 import Vector2
+
+def test_stale_key_is_rejected_after_its_slot_is_reused():
+	slot_map = SlotMap()
+	a, b = slot_map.insert('a'), slot_map.insert('b')
+	assert slot_map.remove(a) == 'a'
+	c = slot_map.insert('c')
+	assert SlotMap.slot_of(c) == SlotMap.slot_of(a) # the slot was reused
+	assert a not in slot_map
+	with pytest.raises(KeyError): slot_map[a]
+	with pytest.raises(KeyError): slot_map.remove(a)
+	assert slot_map[b] == 'b' and slot_map[c] == 'c'
+	assert len(slot_map) == 2
+
+def test_removing_a_middle_vehicle_keeps_the_states_with_their_vehicles():
+	vehicles = [VehicleData(ContinuousCivilianVehicle(), Vector2(i, 2 * i), Vector2(0, i), 0.1 * i) for i in range(5)]
+	simulator = ContinuousSimulator(scenario.obstacles, vehicles)
+	simulator.remove_vehicle(vehicles[1])
+
+	remaining = [v for i, v in enumerate(vehicles) if i != 1]
+	assert len(simulator.vehicles) == len(remaining)
+	with pytest.raises(KeyError): simulator.get_vehicle(vehicles[1].vehicle_id)
+	for i, vehicle in enumerate(vehicles):
+		if i == 1: continue
+		assert simulator.get_vehicle(vehicle.vehicle_id) is vehicle
+		assert simulator.vehicles[vehicle._index] is vehicle
+		assert (vehicle.position.x, vehicle.position.y) == (i, 2 * i)
+		assert (vehicle.velocity.x, vehicle.velocity.y) == (0, i)
+		assert vehicle.heading == pytest.approx(0.1 * i)
+		assert tuple(simulator.states.positions[vehicle._index]) == (i, 2 * i)
+
+	# the removed vehicle keeps its last state
+	assert (vehicles[1].position.x, vehicles[1].position.y) == (1, 2)
@@ -0,0 +1,83 @@
+import numpy as np
+
+from src.algorithms.continuous import algorithm1
+from src.algorithms.continuous.algorithm1 import ArcCollisionMode, ContinuousEmergencyVehicle
+from src.algorithms.continuous.swept_arc import corridor_outline_points
+from src.algorithms.continuous.utils.Arc import Arc, make_arc
+from src.algorithms.continuous.utils.Pose import Pose
+from src.models.continuous.ContinuousSimulator import ContinuousSimulator, VehicleData
+from src.scenarios.continuous.scenario1 import scenario
+from src.utils.Vector2 import Vector2
+from src.utils.frames import relative_to_world
+
+HALF_WIDTH, HALF_LENGTH = 1, 1.5
+
+def box_outline(spacing: float = 0.05) -> np.ndarray:
+	"""(N, 2) points on the edges of the vehicle's box, in its frame"""
+	xs = np.linspace(-HALF_WIDTH, HALF_WIDTH, int(2 * HALF_WIDTH / spacing) + 1)
+	ys = np.linspace(-HALF_LENGTH, HALF_LENGTH, int(2 * HALF_LENGTH / spacing) + 1)
+	return np.concatenate((
+		np.stack((xs, np.full_like(xs, -HALF_LENGTH)), axis=-1),
+		np.stack((xs, np.full_like(xs, HALF_LENGTH)), axis=-1),
+		np.stack((np.full_like(ys, -HALF_WIDTH), ys), axis=-1),
+		np.stack((np.full_like(ys, HALF_WIDTH), ys), axis=-1),
+	))
+
+def assert_corridor_contains_poses(arc: Arc):
+	"""Every box sampled along the arc is inside the annular sector the corridor outline bounds"""
+	outline = corridor_outline_points(arc, HALF_WIDTH, HALF_LENGTH)
+	center = arc.circle.center.np_array
+
+	def polar(points: np.ndarray):
+		offsets = points - center
+		# angles from the arc's start, in the direction it turns
+		angles = (np.arctan2(offsets[:, 0], offsets[:, 1]) - arc.start_angle) * np.sign(arc.arc_angle)
+		return np.hypot(offsets[:, 0], offsets[:, 1]), (angles + np.pi) % (2 * np.pi) - np.pi
+
+	outline_radii, outline_angles = polar(outline)
+	for proportion in np.linspace(0, 1, 21):
+		position, heading = arc.point_on_arc(proportion).np_array, arc.heading_on_arc(proportion)
+		radii, angles = polar(relative_to_world(position, heading, box_outline()))
+		assert np.all(radii >= outline_radii.min() - 1e-6)
+		assert np.all(radii <= outline_radii.max() + 1e-6)
+		assert np.all(angles >= outline_angles.min() - 1e-9)
+		assert np.all(angles <= outline_angles.max() + 1e-9)
+
+def test_corridor_contains_the_vehicle_on_left_and_right_turns():
+	start = Pose(Vector2(2, -3), 0.3)
+	for goal in [Vector2(-1.5, 4), Vector2(1.5, 4), Vector2(-3, 2), Vector2(3, 2)]:
+		arc = make_arc(start, start.position_relative_to_world(goal))
+		assert arc.circle.radius < 100
+		assert_corridor_contains_poses(arc)
+	# both directions were covered
+	assert make_arc(start, start.position_relative_to_world(Vector2(-1.5, 4))).arc_angle < 0
+	assert make_arc(start, start.position_relative_to_world(Vector2(1.5, 4))).arc_angle > 0
+
+def test_corridor_contains_the_vehicle_on_a_near_straight_arc():
+	start = Pose(Vector2(2, -3), 0.3)
+	for goal in [Vector2(1e-4, 4), Vector2(-1e-4, 4)]:
+		arc = make_arc(start, start.position_relative_to_world(goal))
+		assert arc.circle.radius == 10000
+		assert_corridor_contains_poses(arc)
+
+def test_swept_check_reports_every_static_obstacle_hit_of_the_split_check(monkeypatch):
+	emergency = ContinuousEmergencyVehicle()
+	simulator = ContinuousSimulator(scenario.obstacles, [VehicleData(emergency, Vector2(8, 3), Vector2(0, 0), 0.4)])
+	simulator.update_observed_data()
+	assert len(emergency.observed_vehicles) == 0
+
+	rng = np.random.default_rng(0)
+	split_hit_count = 0
+	for _ in range(300):
+		start = Pose(Vector2(*rng.uniform(-6, 6, 2)), rng.uniform(0, 2 * np.pi))
+		angle = rng.uniform(-0.3, 0.3)
+		goal = start.position_relative_to_world(Vector2(np.sin(angle), np.cos(angle)) * emergency.distance_between_poses)
+		arc = make_arc(start, goal)
+		monkeypatch.setattr(algorithm1, 'ARC_COLLISION_MODE', ArcCollisionMode.SPLIT)
+		split_hit = emergency.arc_will_collide(arc, 0)
+		monkeypatch.setattr(algorithm1, 'ARC_COLLISION_MODE', ArcCollisionMode.SWEPT)
+		swept_hit = emergency.arc_will_collide(arc, 0)
+		assert swept_hit or not split_hit
+		split_hit_count += split_hit
+	# the arcs did reach the obstacles
+	assert split_hit_count > 20
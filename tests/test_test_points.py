@@ -0,0 +1,23 @@
+import numpy as np
+
+from src.algorithms.continuous.test_points import test_points_on_box as points_on_box
+
+def test_points_on_box_match_the_baseline():
+	points = np.array([(p.x, p.y) for p in points_on_box(2, 3, 0.1)])
+	# the sides are sampled along the length
+	on_side = np.isclose(np.abs(points[:, 0]), 1) & (np.abs(points[:, 1]) <= 1.5 + 1e-9)
+	# and the front and back rows run from -width / 2 to length / 2, past the right side
+	on_front_or_back = np.isclose(np.abs(points[:, 1]), 1.5)
+	assert np.all(on_side | on_front_or_back)
+	assert np.isclose(points[on_front_or_back, 0].min(), -1)
+	assert np.isclose(points[on_front_or_back, 0].max(), 1.4)
+	assert len(points) == 2 * 25 + 2 * 30
+
+def test_clipped_points_on_box_stay_on_the_box():
+	points = np.array([(p.x, p.y) for p in points_on_box(2, 3, 0.1, clip_to_width=True)])
+	assert np.all(np.abs(points[:, 0]) <= 1 + 1e-9)
+	assert np.all(np.abs(points[:, 1]) <= 1.5 + 1e-9)
+	# every point is on an edge
+	on_side = np.isclose(np.abs(points[:, 0]), 1)
+	on_front_or_back = np.isclose(np.abs(points[:, 1]), 1.5)
+	assert np.all(on_side | on_front_or_back)
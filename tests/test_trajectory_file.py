@@ -0,0 +1,63 @@
+import contextlib
+import io
+import struct
+
+import numpy as np
+import pytest
+
+from src.algorithms.continuous.algorithm1 import ContinuousCivilianVehicle, ContinuousEmergencyVehicle
+from src.models.continuous.ContinuousSimulator import ContinuousSimulator, VehicleData
+from src.models.continuous.TrajectoryFile import MAGIC, VERSION, TrajectoryReader, TrajectoryWriter
+from src.models.continuous.TrajectoryRecorder import TrajectoryFrame, TrajectoryRecorder
+from src.scenarios.continuous.scenario1 import scenario
+from src.utils.SlotMap import SlotMap
+from src.utils.Vector2 import Vector2
+
+def assert_frames_equal(a: TrajectoryFrame, b: TrajectoryFrame):
+	assert a.time == b.time
+	for name in ('alive', 'vehicle_ids', 'vehicle_types', 'positions', 'velocities', 'headings', 'plan_poses'):
+		assert np.array_equal(getattr(a, name), getattr(b, name), equal_nan=True), name
+
+def test_written_file_reads_back_the_recorded_frames(tmp_path):
+	vehicles = [VehicleData(ContinuousCivilianVehicle(), c.position, c.velocity, 0) for c in scenario.civilians[:3]]
+	vehicles.append(VehicleData(ContinuousEmergencyVehicle(), Vector2(0, 0), Vector2(0, 0), 0))
+	simulator = ContinuousSimulator(scenario.obstacles, vehicles, seed=1)
+	in_memory = TrajectoryRecorder(simulator, chunk_size=3)
+	on_disk = TrajectoryRecorder(simulator, chunk_size=3, sink=TrajectoryWriter(str(tmp_path / 'run.traj')))
+	without_plans = TrajectoryRecorder(simulator, max_plan_poses=0, chunk_size=2, sink=TrajectoryWriter(str(tmp_path / 'no_plans.traj')))
+	tick_count = 7
+	with contextlib.redirect_stdout(io.StringIO()):
+		for tick in range(tick_count):
+			if tick == 4: simulator.remove_vehicle(vehicles[1]) # leaves an empty slot
+			simulator.roll_forward(0.5)
+			for recorder in (in_memory, on_disk, without_plans): recorder.record(tick * 0.5)
+	on_disk.close()
+	without_plans.close()
+
+	reader = TrajectoryReader(str(tmp_path / 'run.traj'))
+	assert isinstance(reader.records, np.memmap)
+	assert reader.tick_count == tick_count
+	assert reader.positions.shape == (tick_count, 4, 2)
+	assert np.isnan(reader.positions[-1, SlotMap.slot_of(vehicles[1].vehicle_id)]).all()
+	for tick in range(tick_count):
+		assert_frames_equal(in_memory.frame(tick), reader.frame(tick))
+		assert_frames_equal(in_memory.frame(tick), on_disk.frame(tick))
+
+	reader = TrajectoryReader(str(tmp_path / 'no_plans.traj'))
+	for tick in range(tick_count):
+		frame = reader.frame(tick)
+		assert frame.plan_poses.shape == (4, 0, 3)
+		assert np.array_equal(frame.positions, in_memory.frame(tick).positions, equal_nan=True)
+
+def test_reader_rejects_other_files(tmp_path):
+	writer = TrajectoryWriter(str(tmp_path / 'empty.traj'))
+	writer.start(2, 0)
+	writer.close()
+	assert TrajectoryReader(str(tmp_path / 'empty.traj')).tick_count == 0
+	header = (tmp_path / 'empty.traj').read_bytes()
+
+	(tmp_path / 'magic.traj').write_bytes(b'NOTTRAJ\0' + header[len(MAGIC):])
+	with pytest.raises(ValueError, match='not a trajectory file'): TrajectoryReader(str(tmp_path / 'magic.traj'))
+
+	(tmp_path / 'version.traj').write_bytes(header[:len(MAGIC)] + struct.pack('<I', VERSION + 1) + header[len(MAGIC) + 4:])
+	with pytest.raises(ValueError, match='version'): TrajectoryReader(str(tmp_path / 'version.traj'))